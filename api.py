@@ -0,0 +1,150 @@
+"""
+JSON HTTP API on the NiceGUI (FastAPI) app
+"""
+
+import asyncio
+from fastapi import HTTPException, Request
+from nicegui import run
+from batch_solve import solve_chunk
+from prefilter import rejection_reason, MALFORMED, TOO_MANY_LETTERS
+from solve_cache import canonicalize, default_cache, relabel
+from solver import DIFFICULTY_BANDS, SearchBudget, SearchStopped
+
+# Limits on one request
+API_SOLVE_TIMEOUT = 10.0  # Seconds per puzzle
+MAX_BATCH_SIZE = 10000
+BATCH_CHUNK_SIZE = 64
+MAX_DECK_SIZE = 100
+
+
+class SolveCoalescer:
+    """
+    Share one solve between identical requests that arrive while it runs.
+
+    Requests are matched by canonical shape, so "XY + YX = ZZ" waits on an
+    in-flight "AB + BA = CC". The shape is solved in a worker thread through
+    the bounded solve cache, and every waiter relabels the shared result to
+    its own letters, so nothing is solved on the event loop.
+    """
+
+    def __init__(self, cache=default_cache, timeout=API_SOLVE_TIMEOUT):
+        self.cache = cache
+        self.timeout = timeout
+        self._inflight = {}
+
+    async def solve(self, puzzle):
+        """
+        Solve a puzzle, joining an identical solve already running
+
+        Raises:
+            SearchStopped: If the shared solve ran out of time
+        """
+        canonical = canonicalize(puzzle)
+        if canonical is None:
+            return None
+        shape, letters = canonical
+
+        task = self._inflight.get(shape)
+        if task is None:
+            budget = SearchBudget(timeout=self.timeout)
+            task = asyncio.ensure_future(run.io_bound(self.cache.solve, shape, budget))
+            self._inflight[shape] = task
+            task.add_done_callback(lambda _: self._inflight.pop(shape, None))
+
+        # A client hanging up must not cancel the solve for the others
+        solution = await asyncio.shield(task)
+        return relabel(solution, letters) if solution else None
+
+    def inflight(self):
+        """Number of distinct solves running"""
+        return len(self._inflight)
+
+
+def _check_difficulty(difficulty):
+    if difficulty is not None and difficulty not in DIFFICULTY_BANDS:
+        raise HTTPException(400, f"difficulty must be one of {', '.join(DIFFICULTY_BANDS)}")
+
+
+def register_api(app, get_source):
+    """
+    Add the /api routes to the app
+
+    Args:
+        app: NiceGUI app
+        get_source: Callable returning the puzzle source (PuzzleDatabase or
+            PuzzleSnapshot), called per request since it is created at startup
+    """
+    coalescer = SolveCoalescer()
+
+    @app.get('/api/solve')
+    async def api_solve(puzzle: str):
+        """
+        Solve one puzzle
+
+        Statuses and 'reason' match the batch records: input the solver
+        cannot take is 'invalid' and puzzles the prefilter rules out are
+        'no_solution', neither reaches the solve cache.
+        """
+        reason = rejection_reason(puzzle.strip())
+        if reason is not None:
+            status = 'invalid' if reason in (MALFORMED, TOO_MANY_LETTERS) else 'no_solution'
+            return {'puzzle': puzzle, 'status': status, 'solution': None, 'reason': reason}
+
+        try:
+            solution = await coalescer.solve(puzzle.strip())
+        except SearchStopped:
+            return {'puzzle': puzzle, 'status': 'timeout', 'solution': None}
+        return {
+            'puzzle': puzzle,
+            'status': 'solved' if solution else 'no_solution',
+            'solution': solution
+        }
+
+    @app.post('/api/solve/batch')
+    async def api_solve_batch(request: Request):
+        """
+        Solve a list of puzzles across the worker process pool
+
+        Body: {"puzzles": [...], "timeout": seconds per puzzle, optional}.
+        Results come back in request order, in the batch_solve record format
+        with 'index' for the position in the list.
+        """
+        body = await request.json()
+        puzzles = body.get('puzzles') if isinstance(body, dict) else None
+        if not isinstance(puzzles, list) or not all(isinstance(p, str) for p in puzzles):
+            raise HTTPException(400, 'body must be {"puzzles": [strings]}')
+        if len(puzzles) > MAX_BATCH_SIZE:
+            raise HTTPException(413, f'at most {MAX_BATCH_SIZE} puzzles per batch')
+        timeout = body.get('timeout', API_SOLVE_TIMEOUT)
+        if isinstance(timeout, bool) or not isinstance(timeout, (int, float)) or timeout <= 0:
+            raise HTTPException(400, 'timeout must be a positive number of seconds')
+        timeout = min(timeout, API_SOLVE_TIMEOUT)
+
+        pairs = [(i, puzzle.strip()) for i, puzzle in enumerate(puzzles)]
+        chunks = [pairs[i:i + BATCH_CHUNK_SIZE] for i in range(0, len(pairs), BATCH_CHUNK_SIZE)]
+        results = await asyncio.gather(
+            *(run.cpu_bound(solve_chunk, chunk, timeout, None) for chunk in chunks))
+
+        records = []
+        for chunk_results in results:
+            for record in chunk_results:
+                record['index'] = record.pop('line')
+                records.append(record)
+        return {'results': records}
+
+    @app.get('/api/puzzles/random')
+    def api_random_puzzle(letter_count: int = 3, difficulty: str = None):
+        """Get one random stored puzzle with its solution"""
+        _check_difficulty(difficulty)
+        puzzle = get_source().get_random_puzzle(letter_count, difficulty)
+        if puzzle is None:
+            raise HTTPException(404, 'no matching puzzle')
+        return puzzle
+
+    @app.get('/api/quiz/deck')
+    def api_quiz_deck(size: int = 10, difficulty: str = None):
+        """Get a deck of distinct random 3-letter puzzles with solutions"""
+        _check_difficulty(difficulty)
+        if not 1 <= size <= MAX_DECK_SIZE:
+            raise HTTPException(400, f'size must be between 1 and {MAX_DECK_SIZE}')
+        return {'puzzles': get_source().get_random_puzzles(size, 3, difficulty)}
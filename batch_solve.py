@@ -0,0 +1,176 @@
+"""
+Headless batch solver: streams puzzles through a process pool as NDJSON
+
+    python batch_solve.py puzzles.txt -j 8 --timeout 5 > results.jsonl
+    cat puzzles.txt | python batch_solve.py --order completion
+"""
+
+import argparse
+import fileinput
+import json
+import os
+import sys
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from itertools import islice
+from prefilter import rejection_reason, MALFORMED, TOO_MANY_LETTERS
+from solver import (solve_with_metrics, difficulty_for_score, SearchBudget,
+                    SearchStopped)
+
+
+def solve_one(puzzle, timeout=None, max_nodes=None):
+    """
+    Solve one puzzle into a result record
+
+    Returns:
+        Dictionary with 'puzzle', 'status' ('solved', 'no_solution',
+        'timeout' or 'invalid'), 'solution' (mapping or None), 'reason' for
+        puzzles the prefilter rules out, search 'metrics', 'difficulty' and
+        'time_ms'
+    """
+    start = time.perf_counter()
+    record = {'puzzle': puzzle, 'status': 'no_solution', 'solution': None}
+
+    reason = rejection_reason(puzzle)
+    if reason is not None:
+        record['reason'] = reason
+        if reason in (MALFORMED, TOO_MANY_LETTERS):
+            record['status'] = 'invalid'
+    else:
+        budget = SearchBudget(timeout=timeout, max_nodes=max_nodes)
+        try:
+            solution, metrics = solve_with_metrics(puzzle, budget)
+        except SearchStopped:
+            record['status'] = 'timeout'
+            metrics = budget.metrics()
+        else:
+            if solution:
+                record['status'] = 'solved'
+                record['solution'] = dict(sorted(solution['mapping'].items()))
+                record['difficulty'] = difficulty_for_score(metrics['difficulty_score'])
+        record['metrics'] = metrics
+
+    record['time_ms'] = round((time.perf_counter() - start) * 1000, 3)
+    return record
+
+
+def solve_chunk(chunk, timeout, max_nodes):
+    """Worker task: solve a list of (line number, puzzle) pairs"""
+    results = []
+    for line, puzzle in chunk:
+        record = solve_one(puzzle, timeout, max_nodes)
+        record['line'] = line
+        results.append(record)
+    return results
+
+
+def read_puzzles(files):
+    """
+    Yield (line number, puzzle) from files lazily, '-' or no files for stdin
+
+    Blank lines and lines starting with "#" are skipped, but still counted,
+    so line numbers point back into the input.
+    """
+    with fileinput.input(files or ('-',)) as lines:
+        for number, line in enumerate(lines, start=1):
+            line = line.strip()
+            if line and not line.startswith('#'):
+                yield number, line
+
+
+def solve_stream(puzzles, workers=None, chunk_size=64, ordered=True,
+                 timeout=None, max_nodes=None):
+    """
+    Solve a stream of puzzles across a process pool
+
+    At most workers * 2 chunks are in flight, so memory stays bounded
+    however long the stream is.
+
+    Args:
+        puzzles: Iterable of (line number, puzzle)
+        workers: Worker process count (defaults to the CPU count)
+        chunk_size: Puzzles per worker task
+        ordered: Yield results in input order, otherwise as they complete
+        timeout: Seconds allowed per puzzle
+        max_nodes: Search nodes allowed per puzzle
+
+    Yields:
+        Result records from solve_one, with their input 'line'
+    """
+    workers = workers or os.cpu_count() or 1
+    puzzles = iter(puzzles)
+    max_pending = workers * 2
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        def submit():
+            chunk = list(islice(puzzles, chunk_size))
+            if not chunk:
+                return None
+            return executor.submit(solve_chunk, chunk, timeout, max_nodes)
+
+        if ordered:
+            pending = deque()
+            while True:
+                while len(pending) < max_pending:
+                    future = submit()
+                    if future is None:
+                        break
+                    pending.append(future)
+                if not pending:
+                    return
+                yield from pending.popleft().result()
+        else:
+            pending = set()
+            while True:
+                while len(pending) < max_pending:
+                    future = submit()
+                    if future is None:
+                        break
+                    pending.add(future)
+                if not pending:
+                    return
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Solve cryptarithms from files or stdin, one per line, '
+                    'writing one JSON result per line.')
+    parser.add_argument('files', nargs='*', help="input files, '-' or none for stdin")
+    parser.add_argument('-o', '--output', help='output file (default stdout)')
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help='worker processes (default: CPU count)')
+    parser.add_argument('--order', choices=('input', 'completion'), default='input',
+                        help='result order (default: input)')
+    parser.add_argument('--timeout', type=float, default=None,
+                        help='seconds allowed per puzzle')
+    parser.add_argument('--max-nodes', type=int, default=None,
+                        help='search nodes allowed per puzzle')
+    parser.add_argument('--chunk-size', type=int, default=64,
+                        help='puzzles per worker task (default: 64)')
+    args = parser.parse_args(argv)
+
+    out = open(args.output, 'w') if args.output else sys.stdout
+    statuses = Counter()
+    start = time.perf_counter()
+    try:
+        for record in solve_stream(read_puzzles(args.files), args.workers, args.chunk_size,
+                                   args.order == 'input', args.timeout, args.max_nodes):
+            statuses[record['status']] += 1
+            out.write(json.dumps(record) + '\n')
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    elapsed = time.perf_counter() - start
+    total = sum(statuses.values())
+    print(f"{total} puzzles in {elapsed:.2f}s: " +
+          ', '.join(f'{status} {count}' for status, count in sorted(statuses.items())),
+          file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
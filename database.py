@@ -2,100 +2,529 @@
 SQLite database management for puzzles
 """
 
+import os
+import random
 import sqlite3
 import json
+import threading
+import time
+import weakref
+from string import ascii_uppercase
+from solve_cache import canonicalize
+from solver import (compile_puzzle, solve_with_metrics, difficulty_for_score,
+                    solution_from_mapping)
+
+# Columns added after the first release, with their SQL types
+METRIC_COLUMNS = [
+    ('difficulty_score', 'REAL'),
+    ('search_nodes', 'INTEGER'),
+    ('backtracks', 'INTEGER'),
+]
+
+# Solution details stored next to the mapping, so reads never re-solve
+SOLUTION_COLUMNS = [
+    ('operands', 'TEXT'),  # JSON list of operand words
+    ('result', 'TEXT'),
+    ('operation', 'TEXT'),
+    ('numbers', 'TEXT'),  # JSON list of operand values
+    ('result_num', 'INTEGER'),
+    ('digits', 'BLOB'),  # Letter for each digit 0-9, see encode_digits()
+]
+
+# Columns read to build a ready-to-render solution
+SOLUTION_SELECT = 'puzzle, operands, result, operation, numbers, result_num, digits'
+
+# Rounds of random id probes before falling back to sorting the matches
+RANDOM_PROBE_ROUNDS = 4
+# Most ids looked up in one round
+RANDOM_PROBE_LIMIT = 2000
+
+# Solution access times are buffered and written this many at a time, or
+# once this many seconds have passed since the last write
+SOLUTION_TOUCH_BATCH = 256
+SOLUTION_TOUCH_INTERVAL = 60.0
+
+
+def encode_digits(mapping):
+    """
+    Pack a letter to digit mapping into 10 bytes
+
+    Byte d holds the letter assigned to digit d, or 0 if no letter has it.
+    """
+    vector = bytearray(10)
+    for letter, digit in mapping.items():
+        vector[digit] = ord(letter)
+    return bytes(vector)
+
+
+def decode_digits(digits):
+    """Unpack a 10-byte digit vector into a letter to digit mapping"""
+    return {chr(letter): digit for digit, letter in enumerate(digits) if letter}
+
+
+def _solution_columns(puzzle, mapping):
+    """Get the SOLUTION_COLUMNS values for a puzzle and its mapping"""
+    solution = solution_from_mapping(puzzle, mapping)
+    return (
+        json.dumps(solution['operands']),
+        solution['result'],
+        solution['operation'],
+        json.dumps(solution['numbers']),
+        solution['result_num'],
+        encode_digits(mapping)
+    )
+
+
+def _solution_from_row(row):
+    """Build a solution dictionary from the SOLUTION_SELECT columns of a row"""
+    return {
+        'mapping': decode_digits(row[6]),
+        'operands': json.loads(row[1]),
+        'result': row[2],
+        'operation': row[3],
+        'numbers': json.loads(row[4]),
+        'result_num': row[5]
+    }
+
+
+def _shape(puzzle):
+    """Get the canonical shape stored with a puzzle"""
+    canonical = canonicalize(puzzle)
+    return canonical[0] if canonical else puzzle
+
+
+class _ThreadConnection:
+    """A thread's connection, stored in thread-local data"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.pid = os.getpid()
+
+
+def _discard_connection(conn, pid, connections, lock):
+    """Close a connection whose thread has ended and forget it"""
+    with lock:
+        if conn in connections:
+            connections.remove(conn)
+    # A forked child leaves its parent's connection alone
+    if os.getpid() == pid:
+        conn.close()
+
+
+def _add_columns(cursor, columns):
+    """Add the (name, SQL type) columns the puzzles table does not have yet"""
+    cursor.execute('PRAGMA table_info(puzzles)')
+    existing = set(row[1] for row in cursor.fetchall())
+    for name, sql_type in columns:
+        if name not in existing:
+            cursor.execute(f'ALTER TABLE puzzles ADD COLUMN {name} {sql_type}')
+
+
+def _create_puzzles_table(cursor):
+    """Version 1: the original puzzles table"""
+    cursor.execute('''
+                   CREATE TABLE IF NOT EXISTS puzzles
+                   (
+                       id
+                       INTEGER
+                       PRIMARY
+                       KEY
+                       AUTOINCREMENT,
+                       puzzle
+                       TEXT
+                       UNIQUE
+                       NOT
+                       NULL,
+                       difficulty
+                       TEXT
+                       NOT
+                       NULL,
+                       letter_count
+                       INTEGER
+                       NOT
+                       NULL,
+                       solution
+                       TEXT
+                       NOT
+                       NULL,
+                       created_at
+                       TIMESTAMP
+                       DEFAULT
+                       CURRENT_TIMESTAMP
+                   )
+                   ''')
+
+
+def _add_metric_columns(cursor):
+    """
+    Version 2: search-effort metrics used for difficulty selection
+
+    Each canonical shape of the existing rows is solved once, its metrics
+    hold for every relabeling.
+    """
+    _add_columns(cursor, METRIC_COLUMNS)
+    cursor.execute('''
+                   CREATE INDEX IF NOT EXISTS idx_puzzles_letter_count_score
+                       ON puzzles (letter_count, difficulty_score)
+                   ''')
+
+    cursor.execute('SELECT id, puzzle FROM puzzles WHERE difficulty_score IS NULL')
+    metrics_by_shape = {}
+    updates = []
+    for puzzle_id, puzzle in cursor.fetchall():
+        shape = _shape(puzzle)
+        if shape not in metrics_by_shape:
+            metrics_by_shape[shape] = solve_with_metrics(shape)[1]
+        metrics = metrics_by_shape[shape]
+        updates.append((
+            difficulty_for_score(metrics['difficulty_score']),
+            metrics['difficulty_score'],
+            metrics['nodes'],
+            metrics['backtracks'],
+            puzzle_id
+        ))
+
+    cursor.executemany('''
+                       UPDATE puzzles
+                       SET difficulty       = ?,
+                           difficulty_score = ?,
+                           search_nodes     = ?,
+                           backtracks       = ?
+                       WHERE id = ?
+                       ''', updates)
+
+
+def _create_solutions_table(cursor):
+    """
+    Version 3: solver results keyed by canonical puzzle shape, solution is
+    NULL when the shape has no solution
+    """
+    cursor.execute('''
+                   CREATE TABLE IF NOT EXISTS solutions
+                   (
+                       shape       TEXT PRIMARY KEY,
+                       solution    TEXT,
+                       solve_time  REAL,
+                       last_access REAL NOT NULL
+                   )
+                   ''')
+    cursor.execute('''
+                   CREATE INDEX IF NOT EXISTS idx_solutions_last_access
+                       ON solutions (last_access)
+                   ''')
+
+
+def _add_random_selection_indexes(cursor):
+    """
+    Version 4: random selection seeks into these by id
+
+    The first also serves any filter on (letter_count, difficulty).
+    """
+    cursor.execute('''
+                   CREATE INDEX IF NOT EXISTS idx_puzzles_letter_count_difficulty_id
+                       ON puzzles (letter_count, difficulty, id)
+                   ''')
+    cursor.execute('''
+                   CREATE INDEX IF NOT EXISTS idx_puzzles_letter_count_id
+                       ON puzzles (letter_count, id)
+                   ''')
+
+
+def _add_solution_columns(cursor):
+    """
+    Version 5: solution details, built from each stored mapping without
+    solving
+    """
+    _add_columns(cursor, SOLUTION_COLUMNS)
+    cursor.execute('SELECT id, puzzle, solution FROM puzzles WHERE digits IS NULL')
+    updates = [_solution_columns(puzzle, json.loads(solution)) + (puzzle_id,)
+               for puzzle_id, puzzle, solution in cursor.fetchall()]
+    cursor.executemany('''
+                       UPDATE puzzles
+                       SET operands   = ?,
+                           result     = ?,
+                           operation  = ?,
+                           numbers    = ?,
+                           result_num = ?,
+                           digits     = ?
+                       WHERE id = ?
+                       ''', updates)
+
+
+def _add_shape_column(cursor):
+    """Version 6: canonical shape, linking relabelings to the solutions table"""
+    _add_columns(cursor, [('shape', 'TEXT')])
+    cursor.execute('SELECT id, puzzle FROM puzzles WHERE shape IS NULL')
+    cursor.executemany('UPDATE puzzles SET shape = ? WHERE id = ?',
+                       [(_shape(puzzle), puzzle_id)
+                        for puzzle_id, puzzle in cursor.fetchall()])
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_puzzles_shape ON puzzles (shape)')
+
+
+def _drop_score_index(cursor):
+    """Version 7: selection filters on the difficulty band, not the score"""
+    cursor.execute('DROP INDEX IF EXISTS idx_puzzles_letter_count_score')
+
+
+# Schema migrations in order, the database is at version N once the first N
+# have run (PRAGMA user_version). Append new ones, never edit applied ones.
+# Steps must tolerate databases whose schema predates versioning.
+MIGRATIONS = [
+    _create_puzzles_table,
+    _add_metric_columns,
+    _create_solutions_table,
+    _add_random_selection_indexes,
+    _add_solution_columns,
+    _add_shape_column,
+    _drop_score_index,
+]
 
 
 class PuzzleDatabase:
     """Manage puzzle database with SQLite"""
 
-    def __init__(self, db_path='puzzles.db'):
+    # Applied once to every new connection
+    PRAGMAS = (
+        'PRAGMA journal_mode=WAL',  # Enable WAL mode for better concurrency
+        'PRAGMA synchronous=NORMAL',  # Durable enough with WAL, no fsync per commit
+        'PRAGMA cache_size=-20000',  # About 20 MB of page cache
+        'PRAGMA mmap_size=268435456',  # Read through a 256 MB memory map
+        'PRAGMA temp_store=MEMORY',
+    )
+
+    def __init__(self, db_path='puzzles.db', solution_cache_size=100000, debug=False):
         self.db_path = db_path
+        self.solution_cache_size = solution_cache_size
+        self.debug = debug  # Print query plans after opening
+        # Rows in the solutions table as far as this process knows, and
+        # access times not written yet (shape -> time)
+        self._solution_rows = None
+        self._pending_touches = {}
+        self._last_touch_write = time.time()
+        self._touch_lock = threading.Lock()
+        self._local = threading.local()
+        self._connections = []
+        # Reentrant: close() drops thread-local data, whose finalizers take it
+        self._connections_lock = threading.RLock()
         self.init_database()
 
     def get_connection(self):
-        """Get a database connection with timeout"""
-        conn = sqlite3.connect(self.db_path, timeout=30.0, check_same_thread=False)
-        conn.execute(
-            'PRAGMA journal_mode=WAL')  # Enable WAL mode for better concurrency
+        """
+        Get this thread's database connection, opening it on first use
+
+        Connections stay open while their thread runs, so the PRAGMAs run
+        once and sqlite3 keeps its prepared statement cache. The thread-local
+        data is dropped when the thread ends, which closes the connection.
+        """
+        local = getattr(self._local, 'connection', None)
+        # A forked child must not reuse its parent's connection
+        if local is not None and local.pid == os.getpid():
+            return local.conn
+
+        conn = sqlite3.connect(self.db_path, timeout=30.0,
+                               check_same_thread=False, cached_statements=256)
+        for pragma in self.PRAGMAS:
+            conn.execute(pragma)
+        local = _ThreadConnection(conn)
+        weakref.finalize(local, _discard_connection, conn, local.pid,
+                         self._connections, self._connections_lock)
+        self._local.connection = local
+        with self._connections_lock:
+            self._connections.append(conn)
         return conn
 
+    def release_connection(self, conn):
+        """Finish using a connection, rolling back anything left uncommitted"""
+        if conn.in_transaction:
+            conn.rollback()
+
+    def close(self):
+        """Close every connection opened by this database"""
+        self.flush_solution_touches()
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            # Cleared in place, pending thread finalizers hold this list
+            self._connections.clear()
+            self._local = threading.local()
+
     def init_database(self):
-        """Initialize database schema"""
+        """
+        Bring the schema up to date by running pending MIGRATIONS
+
+        Each migration runs in its own write transaction together with the
+        version bump, so an interrupted upgrade resumes where it stopped.
+        ANALYZE refreshes the planner statistics after any change.
+
+        Returns:
+            Number of migrations applied
+        """
         conn = self.get_connection()
+        applied = 0
         try:
             cursor = conn.cursor()
-            cursor.execute('''
-                           CREATE TABLE IF NOT EXISTS puzzles
-                           (
-                               id
-                               INTEGER
-                               PRIMARY
-                               KEY
-                               AUTOINCREMENT,
-                               puzzle
-                               TEXT
-                               UNIQUE
-                               NOT
-                               NULL,
-                               difficulty
-                               TEXT
-                               NOT
-                               NULL,
-                               letter_count
-                               INTEGER
-                               NOT
-                               NULL,
-                               solution
-                               TEXT
-                               NOT
-                               NULL,
-                               created_at
-                               TIMESTAMP
-                               DEFAULT
-                               CURRENT_TIMESTAMP
-                           )
-                           ''')
-            conn.commit()
+            for version, migrate in enumerate(MIGRATIONS, start=1):
+                # Take the write lock before checking, another process may be upgrading
+                cursor.execute('BEGIN IMMEDIATE')
+                cursor.execute('PRAGMA user_version')
+                if cursor.fetchone()[0] >= version:
+                    conn.commit()
+                    continue
+                migrate(cursor)
+                cursor.execute(f'PRAGMA user_version = {version}')
+                conn.commit()
+                applied += 1
+                print(f"Migrated puzzle database to version {version}")
+
+            if applied:
+                cursor.execute('ANALYZE')
+                conn.commit()
+        finally:
+            self.release_connection(conn)
+
+        if self.debug:
+            for name, plan in self.query_plans().items():
+                print(f"{name}: {'; '.join(plan)}")
+        return applied
+
+    def schema_version(self):
+        """Get the schema version recorded in PRAGMA user_version"""
+        conn = self.get_connection()
+        try:
+            return conn.execute('PRAGMA user_version').fetchone()[0]
+        finally:
+            self.release_connection(conn)
+
+    def explain(self, sql, params=()):
+        """
+        Get SQLite's query plan for a statement
+
+        Returns:
+            List of plan step descriptions, such as
+            "SEARCH puzzles USING INDEX idx_puzzles_shape (shape=?)"
+        """
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            return [row[3] for row in cursor.fetchall()]
         finally:
-            conn.close()
+            self.release_connection(conn)
+
+    def query_plans(self):
+        """
+        Get the query plans of the main read paths, to check index use
 
-    def add_puzzle(self, puzzle, difficulty, letter_count, solution):
-        """Add a puzzle to database"""
+        Returns:
+            Dictionary of query name to plan steps
+        """
+        where, params = self._puzzle_filter(3, 'Easy')
+        return {
+            'random_by_difficulty': self.explain(
+                f'SELECT id FROM puzzles WHERE id IN (?, ?) AND {where}', (0, 1) + params),
+            'min_id_any': self.explain(
+                'SELECT MIN(id) FROM puzzles WHERE letter_count = ?', (3,)),
+            'max_id': self.explain(f'SELECT MAX(id) FROM puzzles WHERE {where}', params),
+            'by_letter_count': self.explain(
+                f'SELECT {SOLUTION_SELECT} FROM puzzles WHERE letter_count = ?', (3,)),
+            'by_shape': self.explain('SELECT puzzle FROM puzzles WHERE shape = ?', ('A+B=C',)),
+            'cached_solution': self.explain(
+                'SELECT solution FROM solutions WHERE shape = ?', ('A+B=C',)),
+        }
+
+    def add_puzzle(self, puzzle, difficulty, letter_count, solution, metrics=None):
+        """Add a puzzle to database, solution is its letter to digit mapping"""
+        metrics = metrics or {}
         conn = self.get_connection()
         try:
             cursor = conn.cursor()
             cursor.execute('''
-                           INSERT INTO puzzles (puzzle, difficulty, letter_count, solution)
-                           VALUES (?, ?, ?, ?)
+                           INSERT INTO puzzles (puzzle, difficulty, letter_count, solution,
+                                                difficulty_score, search_nodes, backtracks,
+                                                operands, result, operation, numbers,
+                                                result_num, digits, shape)
+                           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                            ''',
-                           (puzzle, difficulty, letter_count, json.dumps(solution)))
+                           (puzzle, difficulty, letter_count, json.dumps(solution),
+                            metrics.get('difficulty_score'), metrics.get('nodes'),
+                            metrics.get('backtracks'))
+                           + _solution_columns(puzzle, solution) + (_shape(puzzle),))
             conn.commit()
             return True
         except sqlite3.IntegrityError:
             return False
         finally:
-            conn.close()
+            self.release_connection(conn)
+
+    def add_puzzles_batch(self, puzzles_list, rebuild_indexes=False):
+        """
+        Add multiple puzzles in one transaction
+
+        Rows are (puzzle, difficulty, letter_count, solution) optionally
+        followed by (difficulty_score, search_nodes, backtracks). The
+        solution is the mapping as a JSON string; the solution detail
+        columns are filled from it.
+
+        Rows are consumed lazily, repeats within the input are dropped
+        before reaching SQLite and puzzles already stored are skipped by
+        INSERT OR IGNORE.
+
+        Args:
+            puzzles_list: Any iterable of rows, including a generator
+            rebuild_indexes: Drop the secondary indexes during the load and
+                rebuild them once at the end, faster for very large loads
+
+        Returns:
+            Number of rows actually inserted
+        """
+        seen = set()
+
+        def new_rows():
+            for puzzle_data in puzzles_list:
+                puzzle = puzzle_data[0]
+                if puzzle in seen:
+                    continue
+                seen.add(puzzle)
+                puzzle_data = tuple(puzzle_data) + (None,) * (7 - len(puzzle_data))
+                yield (puzzle_data
+                       + _solution_columns(puzzle, json.loads(puzzle_data[3]))
+                       + (_shape(puzzle),))
 
-    def add_puzzles_batch(self, puzzles_list):
-        """Add multiple puzzles in a batch for better performance"""
         conn = self.get_connection()
-        added = 0
         try:
             cursor = conn.cursor()
-            for puzzle_data in puzzles_list:
-                try:
-                    cursor.execute('''
-                                   INSERT INTO puzzles (puzzle, difficulty, letter_count, solution)
-                                   VALUES (?, ?, ?, ?)
-                                   ''', puzzle_data)
-                    added += 1
-                except sqlite3.IntegrityError:
-                    pass  # Skip duplicates
+            cursor.execute('BEGIN IMMEDIATE')
+
+            indexes = []
+            if rebuild_indexes:
+                # The UNIQUE index on puzzle has no SQL and stays, it does the dedupe
+                cursor.execute('''
+                               SELECT name, sql
+                               FROM sqlite_master
+                               WHERE type = 'index'
+                                 AND tbl_name = 'puzzles'
+                                 AND sql IS NOT NULL
+                               ''')
+                indexes = cursor.fetchall()
+                for name, _ in indexes:
+                    cursor.execute(f'DROP INDEX {name}')
+
+            before = conn.total_changes
+            cursor.executemany('''
+                               INSERT OR IGNORE INTO puzzles (puzzle, difficulty, letter_count, solution,
+                                                              difficulty_score, search_nodes, backtracks,
+                                                              operands, result, operation, numbers,
+                                                              result_num, digits, shape)
+                               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                               ''', new_rows())
+            added = conn.total_changes - before
+
+            for _, sql in indexes:
+                cursor.execute(sql)
             conn.commit()
+            return added
         finally:
-            conn.close()
-        return added
+            self.release_connection(conn)
 
     def get_puzzle_count(self):
         """Get total puzzle count"""
@@ -106,31 +535,125 @@ class PuzzleDatabase:
             count = cursor.fetchone()[0]
             return count
         finally:
-            conn.close()
+            self.release_connection(conn)
 
-    def get_random_puzzle(self, letter_count=3):
-        """Get a random puzzle"""
+    def get_group_counts(self):
+        """
+        Count puzzles per letter count and difficulty
+
+        Returns:
+            Dictionary of (letter_count, difficulty) to puzzle count
+        """
         conn = self.get_connection()
         try:
             cursor = conn.cursor()
             cursor.execute('''
-                           SELECT puzzle, difficulty, solution
+                           SELECT letter_count, difficulty, COUNT(*)
                            FROM puzzles
-                           WHERE letter_count = ?
-                           ORDER BY RANDOM() LIMIT 1
-                           ''', (letter_count,))
+                           GROUP BY letter_count, difficulty
+                           ''')
+            return {(letter_count, difficulty): count
+                    for letter_count, difficulty, count in cursor.fetchall()}
+        finally:
+            self.release_connection(conn)
 
-            result = cursor.fetchone()
+    def _puzzle_filter(self, letter_count, difficulty):
+        """Build the WHERE clause and parameters for a letter count and band"""
+        if difficulty:
+            return 'letter_count = ? AND difficulty = ?', (letter_count, difficulty)
+        return 'letter_count = ?', (letter_count,)
+
+    def get_random_puzzle(self, letter_count=3, difficulty=None):
+        """
+        Get a random puzzle
+
+        Args:
+            letter_count: Number of distinct letters
+            difficulty: Optional difficulty band ('Easy', 'Medium' or 'Hard')
+        """
+        puzzles = self.get_random_puzzles(1, letter_count, difficulty)
+        return puzzles[0] if puzzles else None
+
+    def get_random_puzzles(self, count, letter_count=3, difficulty=None):
+        """
+        Get up to count distinct random puzzles
 
-            if result:
-                return {
-                    'puzzle': result[0],
-                    'difficulty': result[1],
-                    'solution': json.loads(result[2])
-                }
-            return None
+        Instead of sorting the table with ORDER BY RANDOM(), random ids are
+        drawn between the smallest and largest matching id and looked up
+        exactly, keeping those that match the filter. Every matching row is
+        equally likely and each lookup is a primary key seek, so the cost
+        does not grow with the table. Ids of other groups are misses, so each
+        round draws more ids the lower the previous round's hit rate.
+
+        Args:
+            count: Number of puzzles wanted
+            letter_count: Number of distinct letters
+            difficulty: Optional difficulty band ('Easy', 'Medium' or 'Hard')
+
+        Returns:
+            List of puzzle dictionaries in random order, shorter than count
+            only when fewer puzzles match
+        """
+        where, params = self._puzzle_filter(letter_count, difficulty)
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            # Separate queries, SQLite only answers a lone MIN or MAX from the index
+            cursor.execute(f'SELECT MIN(id) FROM puzzles WHERE {where}', params)
+            low = cursor.fetchone()[0]
+            if low is None:
+                return []
+            cursor.execute(f'SELECT MAX(id) FROM puzzles WHERE {where}', params)
+            high = cursor.fetchone()[0]
+
+            picked = {}
+            hit_rate = 1.0
+            for _ in range(RANDOM_PROBE_ROUNDS):
+                missing = count - len(picked)
+                if missing <= 0:
+                    break
+                # Draw extra ids, some miss the group or repeat a pick
+                probes = min(RANDOM_PROBE_LIMIT, int(missing * 2 / hit_rate) + 1)
+                ids = [random.randint(low, high) for _ in range(probes)]
+                cursor.execute(f'''
+                               SELECT id, difficulty, difficulty_score, {SOLUTION_SELECT}
+                               FROM puzzles
+                               WHERE id IN ({', '.join(['?'] * len(ids))})
+                                 AND {where}
+                               ''', ids + list(params))
+                found = {row[0]: row for row in cursor.fetchall()}
+
+                # Keep draw order, the rows come back sorted by id
+                hits = 0
+                for puzzle_id in ids:
+                    if puzzle_id in found:
+                        hits += 1
+                        if len(picked) < count:
+                            picked.setdefault(puzzle_id, found[puzzle_id])
+                hit_rate = max(hits, 1) / probes
+
+            if len(picked) < count:
+                # Only likely when barely more than count puzzles match
+                cursor.execute(f'''
+                               SELECT id, difficulty, difficulty_score, {SOLUTION_SELECT}
+                               FROM puzzles
+                               WHERE {where}
+                               ORDER BY RANDOM() LIMIT ?
+                               ''', params + (count + len(picked),))
+                for row in cursor.fetchall():
+                    if len(picked) < count:
+                        picked.setdefault(row[0], row)
+
+            rows = list(picked.values())
+            random.shuffle(rows)
+            return [{
+                'puzzle': r[3],
+                'difficulty': r[1],
+                'solution': _solution_from_row(r[3:]),
+                'difficulty_score': r[2]
+            } for r in rows]
         finally:
-            conn.close()
+            self.release_connection(conn)
 
     def get_all_puzzles(self, letter_count=None):
         """Get all puzzles, optionally filtered by letter count"""
@@ -139,23 +662,23 @@ class PuzzleDatabase:
             cursor = conn.cursor()
 
             if letter_count:
-                cursor.execute('''
-                               SELECT puzzle, difficulty, solution
+                cursor.execute(f'''
+                               SELECT difficulty, {SOLUTION_SELECT}
                                FROM puzzles
                                WHERE letter_count = ?
                                ''', (letter_count,))
             else:
-                cursor.execute('SELECT puzzle, difficulty, solution FROM puzzles')
+                cursor.execute(f'SELECT difficulty, {SOLUTION_SELECT} FROM puzzles')
 
             results = cursor.fetchall()
 
             return [{
-                'puzzle': r[0],
-                'difficulty': r[1],
-                'solution': json.loads(r[2])
+                'puzzle': r[1],
+                'difficulty': r[0],
+                'solution': _solution_from_row(r[1:])
             } for r in results]
         finally:
-            conn.close()
+            self.release_connection(conn)
 
     def clear_database(self):
         """Clear all puzzles"""
@@ -165,7 +688,190 @@ class PuzzleDatabase:
             cursor.execute('DELETE FROM puzzles')
             conn.commit()
         finally:
-            conn.close()
+            self.release_connection(conn)
+
+    def get_cached_solution(self, shape):
+        """
+        Look up a stored solver result by canonical shape
+
+        Returns:
+            Dictionary with 'solution' (None for unsolvable shapes) and
+            'solve_time', or None if the shape has not been solved yet
+        """
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('''
+                           SELECT solution, solve_time
+                           FROM solutions
+                           WHERE shape = ?
+                           ''', (shape,))
+            result = cursor.fetchone()
+            if not result:
+                return None
+        finally:
+            self.release_connection(conn)
+
+        # Access times only steer eviction, so they are written in batches
+        with self._touch_lock:
+            self._pending_touches[shape] = time.time()
+            due = (len(self._pending_touches) >= SOLUTION_TOUCH_BATCH
+                   or time.time() - self._last_touch_write >= SOLUTION_TOUCH_INTERVAL)
+        if due:
+            self.flush_solution_touches()
+
+        return {
+            'solution': json.loads(result[0]) if result[0] else None,
+            'solve_time': result[1]
+        }
+
+    def flush_solution_touches(self):
+        """Write the buffered solution access times"""
+        conn = self.get_connection()
+        try:
+            if self._write_touches(conn.cursor()):
+                conn.commit()
+        finally:
+            self.release_connection(conn)
+
+    def _write_touches(self, cursor):
+        """Take the buffered access times and update them, returns the count"""
+        with self._touch_lock:
+            touches = [(t, shape) for shape, t in self._pending_touches.items()]
+            self._pending_touches.clear()
+            self._last_touch_write = time.time()
+        cursor.executemany('UPDATE solutions SET last_access = ? WHERE shape = ?', touches)
+        return len(touches)
+
+    def store_solution(self, shape, solution, solve_time):
+        """Store a solver result for a canonical shape, evicting old entries"""
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('''
+                           INSERT OR REPLACE INTO solutions (shape, solution, solve_time, last_access)
+                           VALUES (?, ?, ?, ?)
+                           ''',
+                           (shape, json.dumps(solution) if solution else None,
+                            solve_time, time.time()))
+            self._solutions_added(cursor, 1)
+            conn.commit()
+        finally:
+            self.release_connection(conn)
+
+    def _solutions_added(self, cursor, added):
+        """
+        Count new solution rows and evict once the table is a tenth over the
+        size cap, so the eviction scan runs once per many stores
+        """
+        if self._solution_rows is None:
+            cursor.execute('SELECT COUNT(*) FROM solutions')
+            self._solution_rows = cursor.fetchone()[0]
+        else:
+            # Replaced rows count too, which only brings eviction forward
+            self._solution_rows += added
+        if self._solution_rows > self.solution_cache_size + max(1, self.solution_cache_size // 10):
+            self._evict_solutions(cursor)
+
+    def _evict_solutions(self, cursor):
+        """Drop the least recently used solutions beyond the size cap"""
+        self._write_touches(cursor)
+        cursor.execute('''
+                       DELETE FROM solutions
+                       WHERE shape IN (SELECT shape
+                                       FROM solutions
+                                       ORDER BY last_access DESC
+                                       LIMIT -1 OFFSET ?)
+                       ''', (self.solution_cache_size,))
+        cursor.execute('SELECT COUNT(*) FROM solutions')
+        self._solution_rows = cursor.fetchone()[0]
+
+    def warm_solution_cache(self):
+        """
+        Fill the solutions table from the stored puzzles
+
+        Returns:
+            Number of shapes added
+        """
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('SELECT puzzle, solution FROM puzzles')
+
+            rows = {}
+            for puzzle, solution in cursor.fetchall():
+                canonical = canonicalize(puzzle)
+                if canonical is None or canonical[0] in rows:
+                    continue
+                shape, letters = canonical
+                compiled = compile_puzzle(shape)
+                if compiled is None:
+                    continue
+                mapping = json.loads(solution)
+                canonical_mapping = {ascii_uppercase[i]: mapping[c]
+                                     for i, c in enumerate(letters)}
+                rows[shape] = json.dumps(compiled.solution(canonical_mapping))
+
+            now = time.time()
+            before = conn.total_changes
+            cursor.executemany('''
+                               INSERT OR IGNORE INTO solutions (shape, solution, solve_time, last_access)
+                               VALUES (?, ?, NULL, ?)
+                               ''', [(shape, solution, now) for shape, solution in rows.items()])
+            added = conn.total_changes - before
+            self._solutions_added(cursor, added)
+            conn.commit()
+            return added
+        finally:
+            self.release_connection(conn)
+
+    def iter_puzzle_rows(self, letter_count=None, batch_size=1000, grouped=False):
+        """
+        Stream stored puzzles without loading them all
+
+        Args:
+            letter_count: Optional letter count filter
+            batch_size: Rows fetched from the cursor at a time
+            grouped: Order by (letter_count, difficulty) before id, so each
+                group comes out contiguous
+
+        Yields:
+            Rows in add_puzzles_batch form: (puzzle, difficulty, letter_count,
+            solution, difficulty_score, search_nodes, backtracks)
+        """
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            columns = '''puzzle, difficulty, letter_count, solution,
+                         difficulty_score, search_nodes, backtracks'''
+            order = 'letter_count, difficulty, id' if grouped else 'id'
+            if letter_count:
+                cursor.execute(f'SELECT {columns} FROM puzzles WHERE letter_count = ? ORDER BY {order}',
+                               (letter_count,))
+            else:
+                cursor.execute(f'SELECT {columns} FROM puzzles ORDER BY {order}')
+
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            self.release_connection(conn)
+
+    def max_puzzle_length(self, letter_count=None):
+        """Get the length of the longest stored puzzle string, 0 if none"""
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            if letter_count:
+                cursor.execute('SELECT MAX(LENGTH(puzzle)) FROM puzzles WHERE letter_count = ?',
+                               (letter_count,))
+            else:
+                cursor.execute('SELECT MAX(LENGTH(puzzle)) FROM puzzles')
+            return cursor.fetchone()[0] or 0
+        finally:
+            self.release_connection(conn)
 
     def export_to_json(self, filename='puzzles.json'):
         """Export puzzles to JSON file"""
@@ -2,18 +2,76 @@
 Cryptarithmetic puzzle generator
 """
 
+import os
 import random
 import json
-from solver import solve_cryptarithm
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import permutations
+from string import ascii_uppercase
+from prefilter import Prefilter
+from patterns import PuzzlePattern, PATTERN_SETS
 
+# Use all letters A-Z
+ALL_LETTERS = list('ABCDEFGHIJKLMNOPQRSTUVWXYZ')
 
-def generate_3_letter_puzzles(db, target_count=500):
+
+def _candidate_rows(rng, max_attempts, unique_only, prefilter, patterns):
+    """
+    Yield database rows for solvable random puzzles
+
+    Patterns are checked and solved once when first used, so a candidate
+    only costs a letter draw and a string fill.
+
+    Args:
+        rng: Random number source (the random module or a random.Random)
+        max_attempts: Number of candidates to try
+        unique_only: Keep only puzzles with exactly one solution
+        prefilter: Prefilter recording hopeless candidates
+        patterns: List of PuzzlePattern to draw from
+    """
+    for _ in range(max_attempts):
+        # Try a random pattern
+        pattern = rng.choice(patterns)
+
+        # Randomly select unique letters from A-Z
+        letters = rng.sample(ALL_LETTERS, len(pattern.letters))
+
+        if not prefilter.record(pattern.rejection):
+            continue
+        if unique_only and not pattern.is_unique():
+            continue
+        if pattern.mapping() is None:
+            continue
+
+        yield _pattern_row(pattern, letters)
+
+
+def _pattern_row(pattern, letters):
+    """Build the database row for a pattern filled with letters"""
+    return (
+        pattern.fill(letters),
+        pattern.difficulty,
+        len(pattern.letters),
+        json.dumps(pattern.relabel(letters)),
+        pattern.metrics['difficulty_score'],
+        pattern.metrics['nodes'],
+        pattern.metrics['backtracks']
+    )
+
+
+def generate_3_letter_puzzles(db, target_count=500, unique_only=False,
+                              pattern_set='default', progress=None, cancel_event=None):
     """
     Generate cryptarithmetic puzzles with only 3 unique letters
 
     Args:
         db: PuzzleDatabase instance
         target_count: Number of puzzles to generate
+        unique_only: Keep only puzzles with exactly one solution
+        pattern_set: Name of a registered pattern set to draw from
+        progress: Optional callback(added, to_generate) run after each batch
+        cancel_event: Optional threading.Event, generation stops once it is set
 
     Returns:
         Total puzzle count in database
@@ -23,126 +81,285 @@ def generate_3_letter_puzzles(db, target_count=500):
         return current_count
 
     puzzles_to_generate = target_count - current_count
-    attempts = 0
     max_attempts = puzzles_to_generate * 100
 
-    # Use all letters A-Z
-    all_letters = list('ABCDEFGHIJKLMNOPQRSTUVWXYZ')
-
-    # Generate different pattern templates
-    # Rule: At least 2 words must have 2+ characters (no pure single letter puzzles like A+B=C)
-    patterns = [
-        # Pattern: AA + BB = CC (all multi-char)
-        lambda a, b, c: f"{a}{a} + {b}{b} = {c}{c}",
-        # Pattern: AB + BA = CC (all multi-char)
-        lambda a, b, c: f"{a}{b} + {b}{a} = {c}{c}",
-        # Pattern: AA + BB = ABC (all multi-char)
-        lambda a, b, c: f"{a}{a} + {b}{b} = {a}{b}{c}",
-        # Pattern: ABC + ABC = BCA (all multi-char)
-        lambda a, b, c: f"{a}{b}{c} + {a}{b}{c} = {b}{c}{a}",
-        # Pattern: AB + BA = AC (all multi-char)
-        lambda a, b, c: f"{a}{b} + {b}{a} = {a}{c}",
-        # Pattern: AAA + BBB = CCC (all multi-char)
-        lambda a, b, c: f"{a}{a}{a} + {b}{b}{b} = {c}{c}{c}",
-        # Pattern: AB + AB = BAA (all multi-char)
-        lambda a, b, c: f"{a}{b} + {a}{b} = {b}{a}{a}",
-        # Pattern: ABC + CBA = CAB (all multi-char)
-        lambda a, b, c: f"{a}{b}{c} + {c}{b}{a} = {c}{a}{b}",
-        # Pattern: AB + BC = CA (all multi-char)
-        lambda a, b, c: f"{a}{b} + {b}{c} = {c}{a}",
-        # Pattern: ABC + ABC = ABCC (all multi-char)
-        lambda a, b, c: f"{a}{b}{c} + {a}{b}{c} = {a}{b}{c}{c}",
-        # Pattern: AAB + BAA = BBA (all multi-char)
-        lambda a, b, c: f"{a}{a}{b} + {b}{a}{a} = {b}{b}{a}",
-        # Pattern: ABA + BAB = CAC (all multi-char)
-        lambda a, b, c: f"{a}{b}{a} + {b}{a}{b} = {c}{a}{c}",
-        # Pattern: AA + AB = BA (all multi-char)
-        lambda a, b, c: f"{a}{a} + {a}{b} = {b}{a}",
-        # Pattern: ABC + AB = CAB (all multi-char)
-        lambda a, b, c: f"{a}{b}{c} + {a}{b} = {c}{a}{b}",
-        # Pattern: AA + B = CC (2 multi-char, 1 single OK)
-        lambda a, b, c: f"{a}{a} + {b} = {c}{c}",
-        # Pattern: AB + C = BA (2 multi-char, 1 single OK)
-        lambda a, b, c: f"{a}{b} + {c} = {b}{a}",
-        # Pattern: AAA + B = CCC (2 multi-char, 1 single OK)
-        lambda a, b, c: f"{a}{a}{a} + {b} = {c}{c}{c}",
-        # Pattern: AB + AB = CC (all multi-char)
-        lambda a, b, c: f"{a}{b} + {a}{b} = {c}{c}",
-        # Pattern: AA + AA = BB (all multi-char)
-        lambda a, b, c: f"{a}{a} + {a}{a} = {b}{b}",
-        # Pattern: AAB + C = BAA (2 multi-char, 1 single OK)
-        lambda a, b, c: f"{a}{a}{b} + {c} = {b}{a}{a}",
-    ]
-
     # Collect valid puzzles in batches
     batch_size = 50
     puzzle_batch = []
+    added_total = 0
+
+    # Throw away candidates that provably have no solution before solving
+    prefilter = Prefilter()
 
     print(f"Generating {puzzles_to_generate} new puzzles...")
 
-    while len(puzzle_batch) < puzzles_to_generate and attempts < max_attempts:
-        attempts += 1
+    patterns = PATTERN_SETS[pattern_set]
+    for row in _candidate_rows(random, max_attempts, unique_only, prefilter, patterns):
+        if cancel_event is not None and cancel_event.is_set():
+            print("Generation cancelled")
+            break
+        puzzle_batch.append(row)
 
-        # Randomly select 3 unique letters from A-Z
-        selected_letters = random.sample(all_letters, 3)
-        a, b, c = selected_letters
+        # Save batch when it reaches batch_size or could complete the target
+        if len(puzzle_batch) >= min(batch_size, puzzles_to_generate - added_total):
+            added = db.add_puzzles_batch(puzzle_batch)
+            added_total += added
+            print(f"Added {added} puzzles... (Total: {db.get_puzzle_count()})")
+            puzzle_batch = []
+            if progress is not None:
+                progress(added_total, puzzles_to_generate)
+            if added_total >= puzzles_to_generate:
+                break
 
-        # Try a random pattern
-        pattern = random.choice(patterns)
-        puzzle = pattern(a, b, c)
-
-        # Validate: at least 2 words must have 2+ characters
-        parts = puzzle.replace(" ", "").split("=")
-        left_side = parts[0]
-        if "+" in left_side:
-            words = left_side.split("+") + [parts[1]]
-        elif "-" in left_side:
-            words = left_side.split("-") + [parts[1]]
-        else:
-            continue
+    # Save remaining puzzles
+    if puzzle_batch:
+        added = db.add_puzzles_batch(puzzle_batch)
+        added_total += added
+        print(f"Added {added} puzzles... (Total: {db.get_puzzle_count()})")
+        if progress is not None:
+            progress(added_total, puzzles_to_generate)
 
-        # Count words with 2+ characters
-        multi_char_count = sum(1 for word in words if len(word) >= 2)
+    stats = prefilter.stats()
+    print(f"Prefilter: {stats['passed']}/{stats['checked']} candidates passed, "
+          f"rejected {stats['rejected']}")
 
-        # Skip if less than 2 words have multiple characters
-        if multi_char_count < 2:
-            continue
+    total = db.get_puzzle_count()
+    print(f"✓ Generation complete! Database now contains {total} puzzles")
+    return total
+
+
+def _generate_chunk(seed, task_index, attempts, unique_only, patterns):
+    """
+    Worker task: try a fixed number of candidates with a per-task seed
+
+    Returns:
+        Tuple (rows, prefilter stats)
+    """
+    rng = random.Random(f"{seed}:{task_index}")
+    prefilter = Prefilter()
+    rows = list(_candidate_rows(rng, attempts, unique_only, prefilter, patterns))
+    return rows, prefilter.stats()
+
+
+def generate_puzzles_parallel(db, target_count=500, workers=None, seed=0,
+                              unique_only=False, attempts_per_task=2000,
+                              batch_size=1000, pattern_set='default'):
+    """
+    Generate 3-letter puzzles across a process pool
+
+    Candidates are generated and solved in worker processes, each task with
+    its own seed derived from seed. Results are consumed in task order, so a
+    run is reproducible whatever the worker count. Only this process writes
+    to the database, committing in batches as results stream back.
+
+    Args:
+        db: PuzzleDatabase instance
+        target_count: Number of puzzles the database should contain
+        workers: Worker process count (defaults to the CPU count)
+        seed: Base seed for the per-task random generators
+        unique_only: Keep only puzzles with exactly one solution
+        attempts_per_task: Candidates tried by each worker task
+        batch_size: Rows per database commit
+        pattern_set: Name of a registered pattern set to draw from
+
+    Returns:
+        Total puzzle count in database
+    """
+    current_count = db.get_puzzle_count()
+    if current_count >= target_count:
+        return current_count
+
+    puzzles_to_generate = target_count - current_count
+    # Sent along with each task, so sets registered at runtime reach the workers
+    patterns = PATTERN_SETS[pattern_set]
+    max_tasks = max(1, puzzles_to_generate * 100 // attempts_per_task)
+    workers = workers or os.cpu_count() or 1
+
+    puzzle_batch = []
+    added_total = 0
+    rejected = {}
+
+    print(f"Generating {puzzles_to_generate} new puzzles with {workers} workers...")
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        next_task = 0
+        pending = deque()
 
-        # Try to solve it
-        solution = solve_cryptarithm(puzzle)
-
-        if solution:
-            # Determine difficulty based on complexity
-            letter_set = set(puzzle.replace('+', '').replace('=', '').replace(' ', ''))
-            puzzle_length = len(
-                puzzle.replace('+', '').replace('=', '').replace(' ', ''))
-
-            if puzzle_length <= 8:
-                difficulty = "Easy"
-            elif puzzle_length <= 12:
-                difficulty = "Medium"
-            else:
-                difficulty = "Hard"
-
-            # Add to batch
-            puzzle_batch.append((
-                puzzle,
-                difficulty,
-                len(letter_set),
-                json.dumps(solution['mapping'])
-            ))
-
-            # Save batch when it reaches batch_size
-            if len(puzzle_batch) >= batch_size:
-                added = db.add_puzzles_batch(puzzle_batch)
+        while added_total < puzzles_to_generate:
+            # Keep every worker busy with one queued task behind it
+            while next_task < max_tasks and len(pending) < workers * 2:
+                pending.append(executor.submit(
+                    _generate_chunk, seed, next_task, attempts_per_task, unique_only,
+                    patterns))
+                next_task += 1
+            if not pending:
+                break
+
+            rows, stats = pending.popleft().result()
+            puzzle_batch.extend(rows)
+            for reason, count in stats['rejected'].items():
+                rejected[reason] = rejected.get(reason, 0) + count
+
+            if len(puzzle_batch) >= min(batch_size, puzzles_to_generate - added_total):
+                # Trim the last batch so the target is not overshot
+                added = db.add_puzzles_batch(
+                    puzzle_batch[:puzzles_to_generate - added_total])
+                added_total += added
                 print(f"Added {added} puzzles... (Total: {db.get_puzzle_count()})")
                 puzzle_batch = []
 
+        for future in pending:
+            future.cancel()
+
     # Save remaining puzzles
     if puzzle_batch:
-        added = db.add_puzzles_batch(puzzle_batch)
+        added = db.add_puzzles_batch(puzzle_batch[:puzzles_to_generate - added_total])
+        print(f"Added {added} puzzles... (Total: {db.get_puzzle_count()})")
+
+    print(f"Prefilter rejected {rejected}")
+
+    total = db.get_puzzle_count()
+    print(f"✓ Generation complete! Database now contains {total} puzzles")
+    return total
+
+
+def enumerate_templates(letter_count=3, max_word_length=3):
+    """
+    Yield every canonical "WORD1 + WORD2 = RESULT" template
+
+    Letters are named in order of first appearance, so each template stands
+    for the whole class of puzzles obtained by renaming its letters. Only
+    templates with exactly letter_count letters and at least 2 multi-character
+    words are produced.
+
+    Args:
+        letter_count: Number of distinct letters
+        max_word_length: Longest allowed word
+
+    Yields:
+        Templates such as "AB + BA = CC"
+    """
+    lengths = range(1, max_word_length + 1)
+    for len1 in lengths:
+        for len2 in lengths:
+            for len3 in lengths:
+                if sum(1 for n in (len1, len2, len3) if n >= 2) < 2:
+                    continue
+                total = len1 + len2 + len3
+                for letters in _growth_strings(total, letter_count):
+                    word1 = letters[:len1]
+                    word2 = letters[len1:len1 + len2]
+                    result = letters[len1 + len2:]
+                    yield f"{word1} + {word2} = {result}"
+
+
+def _growth_strings(length, letter_count):
+    """
+    Yield strings over A, B, C, ... using exactly letter_count letters, each
+    letter first appearing after the previous one
+    """
+    def extend(prefix, used):
+        remaining = length - len(prefix)
+        if remaining == 0:
+            if used == letter_count:
+                yield prefix
+            return
+        # Not enough positions left to introduce the missing letters
+        if remaining < letter_count - used:
+            return
+        for i in range(min(used + 1, letter_count)):
+            yield from extend(prefix + ascii_uppercase[i], max(used, i + 1))
+
+    yield from extend('', 0)
+
+
+def _solvable_templates(letter_count, max_word_length, unique_only, prefilter):
+    """Yield a solved PuzzlePattern for each solvable template, solving lazily"""
+    for template in enumerate_templates(letter_count, max_word_length):
+        pattern = PuzzlePattern(template)
+        if not prefilter.record(pattern.rejection):
+            continue
+        if unique_only and not pattern.is_unique():
+            continue
+        if pattern.mapping() is not None:
+            yield pattern
+
+
+def generate_enumerated_puzzles(db, target_count=500, letter_count=3,
+                                max_word_length=3, unique_only=False, seed=0):
+    """
+    Generate puzzles by walking the template space instead of random sampling
+
+    Templates are solved as they are reached, each exactly once, and each
+    first gives one puzzle, so the puzzles cover as many shapes as the
+    target allows. Only when the templates run out do they take turns
+    producing further letter relabelings, which are all distinct, until the
+    target is reached or the space is used up.
+
+    Args:
+        db: PuzzleDatabase instance
+        target_count: Number of puzzles the database should contain
+        letter_count: Number of distinct letters per puzzle
+        max_word_length: Longest allowed word
+        unique_only: Keep only puzzles with exactly one solution
+        seed: Seed for the alphabet order used by the relabelings
+
+    Returns:
+        Total puzzle count in database
+    """
+    current_count = db.get_puzzle_count()
+    if current_count >= target_count:
+        return current_count
+
+    puzzles_to_generate = target_count - current_count
+    prefilter = Prefilter()
+    alphabet = random.Random(seed).sample(ALL_LETTERS, len(ALL_LETTERS))
+    relabelings = permutations(alphabet, letter_count)
+    batch_size = 1000
+    puzzle_batch = []
+    added_total = 0
+
+    def save(rows):
+        """Insert rows up to the target, returns the number added"""
+        added = db.add_puzzles_batch(rows[:puzzles_to_generate - added_total])
         print(f"Added {added} puzzles... (Total: {db.get_puzzle_count()})")
+        return added
+
+    print(f"Generating {puzzles_to_generate} new puzzles...")
+
+    # One puzzle per template while new templates last, solving them lazily
+    # (rows already stored are skipped by the insert, the walk goes on)
+    first_letters = next(relabelings)
+    solved = []
+    for pattern in _solvable_templates(letter_count, max_word_length, unique_only, prefilter):
+        solved.append(pattern)
+        puzzle_batch.append(_pattern_row(pattern, first_letters))
+        if len(puzzle_batch) >= min(batch_size, puzzles_to_generate - added_total):
+            added_total += save(puzzle_batch)
+            puzzle_batch = []
+            if added_total >= puzzles_to_generate:
+                break
+
+    # Then the templates take turns with further relabelings
+    if added_total < puzzles_to_generate:
+        for letters in relabelings:
+            for pattern in solved:
+                puzzle_batch.append(_pattern_row(pattern, letters))
+
+            if len(puzzle_batch) >= min(batch_size, puzzles_to_generate - added_total):
+                added_total += save(puzzle_batch)
+                puzzle_batch = []
+                if added_total >= puzzles_to_generate:
+                    break
+
+    # Save remaining puzzles
+    if puzzle_batch:
+        save(puzzle_batch)
+
+    stats = prefilter.stats()
+    print(f"Used {len(solved)} solvable templates out of {stats['checked']} checked "
+          f"(rejected {stats['rejected']})")
 
     total = db.get_puzzle_count()
     print(f"✓ Generation complete! Database now contains {total} puzzles")
-    return total
\ No newline at end of file
+    return total
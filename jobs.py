@@ -0,0 +1,148 @@
+"""
+Background puzzle generation jobs
+"""
+
+import threading
+import time
+from generator import generate_3_letter_puzzles
+from patterns import PATTERN_SETS, register_pattern_set
+
+
+class GenerationJob:
+    """State of one generation run, safe to read from other threads"""
+
+    def __init__(self, name, count):
+        self.name = name
+        self.count = count  # Puzzles to add
+        self.added = 0
+        self.status = 'running'  # Then 'done', 'cancelled' or 'failed'
+        self.error = None
+        self.started = time.time()
+        self.finished = None
+        self.cancel_event = threading.Event()
+
+    def report(self, added, count):
+        """Progress callback for the generator"""
+        self.added = added
+        self.count = count
+
+    def fraction(self):
+        """Share of the job done, between 0 and 1"""
+        return min(1.0, self.added / self.count) if self.count else 1.0
+
+    def is_running(self):
+        return self.status == 'running'
+
+
+class JobRunner:
+    """
+    Run puzzle generation on a background thread, one job at a time.
+
+    Optional watermarks give a minimum puzzle count per (letter_count,
+    difficulty); replenish() tops up the first group found below its
+    minimum, drawing only on patterns of that letter count and difficulty.
+    """
+
+    def __init__(self, db, watermarks=None):
+        self.db = db
+        self.watermarks = watermarks or {}
+        self.job = None  # Latest job, running or finished
+        self._lock = threading.Lock()
+        self._unfillable = set()  # Groups no pattern can produce
+        self._stop = threading.Event()
+
+    def start(self, count, pattern_set='default', name=None):
+        """
+        Start generating count new puzzles in the background
+
+        Returns:
+            The new GenerationJob, or None if a job is already running
+        """
+        with self._lock:
+            if self.job is not None and self.job.is_running():
+                return None
+            job = GenerationJob(name or f"Generate {count} puzzles", count)
+            self.job = job
+
+        thread = threading.Thread(target=self._run, args=(job, pattern_set), daemon=True)
+        thread.start()
+        return job
+
+    def _run(self, job, pattern_set):
+        """Thread body: run the generator and record how it ended"""
+        try:
+            target = self.db.get_puzzle_count() + job.count
+            generate_3_letter_puzzles(self.db, target, pattern_set=pattern_set,
+                                      progress=job.report, cancel_event=job.cancel_event)
+            job.status = 'cancelled' if job.cancel_event.is_set() else 'done'
+        except Exception as e:
+            job.error = str(e)
+            job.status = 'failed'
+        job.finished = time.time()
+
+    def cancel(self):
+        """Ask the running job, if any, to stop after its current batch"""
+        job = self.job
+        if job is not None and job.is_running():
+            job.cancel_event.set()
+
+    def is_running(self):
+        job = self.job
+        return job is not None and job.is_running()
+
+    def replenish(self):
+        """
+        Start a top-up job for the first group below its watermark
+
+        Returns:
+            The started GenerationJob, or None
+        """
+        if self.is_running() or not self.watermarks:
+            return None
+
+        counts = self.db.get_group_counts()
+        for (letter_count, difficulty), minimum in self.watermarks.items():
+            missing = minimum - counts.get((letter_count, difficulty), 0)
+            if missing <= 0 or (letter_count, difficulty) in self._unfillable:
+                continue
+            pattern_set = self._group_pattern_set(letter_count, difficulty)
+            if pattern_set is None:
+                print(f"No pattern produces {letter_count}-letter {difficulty} puzzles")
+                self._unfillable.add((letter_count, difficulty))
+                continue
+            return self.start(missing, pattern_set,
+                              f"Top up {letter_count}-letter {difficulty} puzzles")
+        return None
+
+    def _group_pattern_set(self, letter_count, difficulty):
+        """Register and name the default patterns of one group, None if empty"""
+        name = f"{letter_count}-letter {difficulty}"
+        if name not in PATTERN_SETS:
+            patterns = [pattern for pattern in PATTERN_SETS['default']
+                        if len(pattern.letters) == letter_count
+                        and pattern.rejection is None
+                        and pattern.mapping() is not None
+                        and pattern.difficulty == difficulty]
+            if not patterns:
+                return None
+            register_pattern_set(name, patterns)
+        return name
+
+    def start_auto_replenish(self, interval=60.0):
+        """Check the watermarks every interval seconds on a daemon thread"""
+        def loop():
+            while True:
+                try:
+                    self.replenish()
+                except Exception as e:
+                    print(f"Replenish check failed: {e}")
+                if self._stop.wait(interval):
+                    break
+
+        self._stop.clear()
+        threading.Thread(target=loop, daemon=True).start()
+
+    def stop(self):
+        """Stop automatic replenishing and cancel the running job"""
+        self._stop.set()
+        self.cancel()
@@ -1,13 +1,84 @@
-from nicegui import ui
+import time
+
+_started = time.perf_counter()
+
+import os
+from nicegui import app, ui
 from database import PuzzleDatabase
 from quiz_state import QuizState
-from generator import generate_3_letter_puzzles
+from snapshot import PuzzleSnapshot
+from jobs import JobRunner
+from puzzle_io import import_ndjson
+from solve_cache import default_cache
 from ui_solver import create_solver_page
 from ui_quiz import create_quiz_page
+from api import register_api
+
+# Packed read-only copy of the puzzles, see snapshot.build_snapshot()
+SNAPSHOT_PATH = 'puzzles.snap'
+
+# Prebuilt puzzles loaded into an empty database (puzzle_io JSON Lines)
+SEED_CORPUS_PATH = 'seed_puzzles.jsonl'
+
+# Auto-reload on code changes, set CRYPTARITHM_RELOAD=0 in production
+RELOAD = os.environ.get('CRYPTARITHM_RELOAD', '1') == '1'
+
+# Global instances, created by startup() so importing this module stays cheap
+# (with reload=True it is imported by the watcher process as well)
+db = None
+quiz_state = None
+jobs = None
+
+_import_time = time.perf_counter() - _started
+
+
+def startup():
+    """Open the database and services once the server process starts"""
+    global db, quiz_state, jobs
+    phases = [('imports', _import_time)]
+
+    def phase(name, since):
+        now = time.perf_counter()
+        phases.append((name, now - since))
+        return now
 
-# Initialize global instances
-db = PuzzleDatabase()
-quiz_state = QuizState(db)
+    t = time.perf_counter()
+    db = PuzzleDatabase()
+    # Persist solver results so restarts and other processes reuse them
+    default_cache.db = db
+    t = phase('database', t)
+
+    # An empty database gets the seed corpus in one bulk load
+    if db.get_puzzle_count() == 0 and os.path.exists(SEED_CORPUS_PATH):
+        print(f"Loaded {import_ndjson(db, SEED_CORPUS_PATH)} seed puzzles")
+    t = phase('seed corpus', t)
+
+    # Serve quiz decks from the snapshot when one has been built
+    snapshot = PuzzleSnapshot(SNAPSHOT_PATH) if os.path.exists(SNAPSHOT_PATH) else None
+    quiz_state = QuizState(db, snapshot)
+
+    # Background generation, topping up each quiz difficulty below its
+    # minimum; nothing is generated before the server is up
+    jobs = JobRunner(db, watermarks={(3, 'Easy'): 200, (3, 'Medium'): 200})
+    jobs.start_auto_replenish()
+    phase('services', t)
+
+    print('Startup: ' + ', '.join(f'{name} {seconds * 1000:.1f} ms' for name, seconds in phases))
+
+
+def shutdown():
+    """Stop background work and close the pooled database connections"""
+    if jobs is not None:
+        jobs.stop()
+    if db is not None:
+        db.close()
+
+
+app.on_startup(startup)
+app.on_shutdown(shutdown)
+
+# JSON endpoints under /api, reading the quiz state's puzzle source per request
+register_api(app, lambda: quiz_state.source)
 
 
 @ui.page('/')
@@ -44,23 +115,18 @@ def main_page():
                              remove='bg-purple-500 text-white')
             solver_btn.classes('bg-purple-500 text-white font-semibold',
                                remove='bg-white text-purple-700')
-            create_quiz_page(content_area, db, quiz_state)
+            create_quiz_page(content_area, db, quiz_state, jobs)
 
     # Show solver page by default
     show_page('solver')
 
 
 if __name__ in {"__main__", "__mp_main__"}:
-    # Generate initial puzzles if database is empty
-    if db.get_puzzle_count() == 0:
-        print("Generating initial puzzle database...")
-        generate_3_letter_puzzles(db, 500)
-
     ui.run(
         title='Cryptarithmetic App',
         favicon='🔢',
         dark=False,
-        reload=True,
+        reload=RELOAD,
         show=True,
         port=8080
     )
\ No newline at end of file
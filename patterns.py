@@ -0,0 +1,146 @@
+"""
+Declarative puzzle pattern templates
+"""
+
+from string import ascii_uppercase
+from solver import (parse_puzzle, CompiledPuzzle, solve_with_metrics,
+                    count_solutions, difficulty_for_score)
+from solve_cache import canonicalize
+from prefilter import rejection_reason
+
+
+class PuzzlePattern:
+    """
+    A puzzle template such as "AB + BA = CC", compiled once.
+
+    The template's letters are placeholders: fill() renames them to produce
+    concrete puzzles, which all share the template's word lengths, solution
+    and search metrics. The template is solved lazily, at most once, and
+    its difficulty comes from the effort of that solve.
+    """
+
+    def __init__(self, text):
+        canonical = canonicalize(text)
+        if canonical is None:
+            raise ValueError(f"Malformed pattern: {text!r}")
+
+        operands, result, operation = parse_puzzle(canonical[0])
+        words = operands + [result]
+
+        self.text = f" {operation} ".join(operands) + f" = {result}"
+        self.letters = ascii_uppercase[:len(set(''.join(words)))]
+        if len(self.letters) > 10:
+            raise ValueError(f"Pattern uses more than 10 letters: {text!r}")
+
+        self.word_lengths = tuple(len(word) for word in words)
+        self.multi_char_count = sum(1 for n in self.word_lengths if n >= 2)
+        # Rule: At least 2 words must have 2+ characters (no pure single letter puzzles like A+B=C)
+        if self.multi_char_count < 2:
+            raise ValueError(f"Pattern needs at least 2 multi-character words: {text!r}")
+
+        self.puzzle_length = sum(self.word_lengths)
+        self.compiled = CompiledPuzzle(operands, result, operation)
+        self.rejection = rejection_reason(self.text)
+
+        # "{0}{1} + {1}{0} = {2}{2}" for fast filling
+        self._format = ''.join(
+            '{%d}' % self.letters.index(c) if c in self.letters else c
+            for c in self.text
+        )
+        self._mapping = None
+        self._solved = False
+        self._unique = None
+        self.metrics = None
+        self.difficulty = None
+
+    def fill(self, letters):
+        """Build the puzzle string with the placeholders renamed to letters"""
+        return self._format.format(*letters)
+
+    def mapping(self):
+        """Get the solution mapping of the template, or None if unsolvable"""
+        if not self._solved:
+            if self.rejection is None:
+                solution, self.metrics = solve_with_metrics(self.compiled)
+                self.difficulty = difficulty_for_score(self.metrics['difficulty_score'])
+                self._mapping = solution['mapping'] if solution else None
+            self._solved = True
+        return self._mapping
+
+    def is_unique(self):
+        """Check whether the template has exactly one solution"""
+        if self._unique is None:
+            self._unique = (self.rejection is None
+                            and count_solutions(self.compiled, limit=2) == 1)
+        return self._unique
+
+    def relabel(self, letters):
+        """Get the solution mapping for the puzzle filled with letters"""
+        return {letters[self.letters.index(c)]: d for c, d in self.mapping().items()}
+
+    def __repr__(self):
+        return f"PuzzlePattern({self.text!r})"
+
+
+def compile_patterns(texts):
+    """Compile a list of pattern strings"""
+    return [PuzzlePattern(text) for text in texts]
+
+
+def load_pattern_file(path):
+    """
+    Read patterns from a text file, one per line.
+
+    Blank lines and lines starting with "#" are ignored.
+
+    Returns:
+        List of PuzzlePattern
+    """
+    texts = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                texts.append(line)
+    return compile_patterns(texts)
+
+
+# Generate different pattern templates
+DEFAULT_PATTERNS = compile_patterns([
+    "AA + BB = CC",
+    "AB + BA = CC",
+    "AA + BB = ABC",
+    "ABC + ABC = BCA",
+    "AB + BA = AC",
+    "AAA + BBB = CCC",
+    "AB + AB = BAA",
+    "ABC + CBA = CAB",
+    "AB + BC = CA",
+    "ABC + ABC = ABCC",
+    "AAB + BAA = BBA",
+    "ABA + BAB = CAC",
+    "AA + AB = BA",
+    "ABC + AB = CAB",
+    # 2 multi-char, 1 single OK
+    "AA + B = CC",
+    "AB + C = BA",
+    "AAA + B = CCC",
+    "AB + AB = CC",
+    "AA + AA = BB",
+    "AAB + C = BAA",
+])
+
+PATTERN_SETS = {'default': DEFAULT_PATTERNS}
+
+
+def register_pattern_set(name, patterns):
+    """
+    Make a pattern set available to the generator by name
+
+    Args:
+        name: Name of the set
+        patterns: List of PuzzlePattern, or a path to a pattern file
+    """
+    if isinstance(patterns, str):
+        patterns = load_pattern_file(patterns)
+    PATTERN_SETS[name] = list(patterns)
\ No newline at end of file
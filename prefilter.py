@@ -0,0 +1,123 @@
+"""
+Cheap unsatisfiability checks run before a full solver search
+"""
+
+from collections import Counter
+from itertools import permutations
+from solver import parse_puzzle, CompiledPuzzle
+
+# Rejection reason codes
+MALFORMED = 'malformed'
+TOO_MANY_LETTERS = 'too_many_letters'
+WORD_LENGTH = 'word_length'
+LEADING_LETTERS = 'leading_letters'
+MOD_9 = 'mod_9'
+MOD_10 = 'mod_10'
+
+# Congruence checks give up (and accept) beyond this many constrained letters
+MAX_CONGRUENCE_LETTERS = 4
+
+
+def rejection_reason(puzzle):
+    """
+    Find a quick proof that a puzzle has no solution.
+
+    A None result does not mean the puzzle is solvable, only that none of
+    the checks could rule it out.
+
+    Args:
+        puzzle: String in format "WORD1 + WORD2 = RESULT"
+
+    Returns:
+        Reason code of the first failed check, or None
+    """
+    parsed = parse_puzzle(puzzle)
+    if parsed is None:
+        return MALFORMED
+
+    operands, result, operation = parsed
+    if len(set(''.join(operands) + result)) > 10:
+        return TOO_MANY_LETTERS
+
+    compiled = CompiledPuzzle(operands, result, operation)
+
+    if not _lengths_feasible(compiled.addends, compiled.total):
+        return WORD_LENGTH
+
+    # Ten letters use every digit, so one of them has to take 0
+    if len(compiled.letters) == 10 and all(compiled.nonzero):
+        return LEADING_LETTERS
+
+    # Every power of ten is 1 mod 9, and only the units column counts mod 10
+    if not _congruence_feasible(compiled, 9):
+        return MOD_9
+    if not _congruence_feasible(compiled, 10):
+        return MOD_10
+
+    return None
+
+
+def _lengths_feasible(addends, total):
+    """Check that the total can have as many digits as it is written with"""
+    longest = max(len(word) for word in addends)
+
+    # A multi-digit addend has a non-zero leading digit, the total is at least as big
+    if longest > 1 and len(total) < longest:
+        return False
+
+    largest_total = len(addends) * (10 ** longest - 1)
+    return len(total) <= len(str(largest_total))
+
+
+def _congruence_feasible(compiled, modulus):
+    """
+    Check that sum(coefficient * digit) can be 0 modulo modulus with
+    distinct digits.
+
+    Only letters whose coefficient is non-zero modulo modulus are assigned,
+    which keeps the enumeration tiny.
+    """
+    constrained = [(c % modulus, nonzero)
+                   for c, nonzero in zip(compiled.coefficients, compiled.nonzero)
+                   if c % modulus]
+    if len(constrained) > MAX_CONGRUENCE_LETTERS:
+        return True
+
+    for digits in permutations(range(10), len(constrained)):
+        total = 0
+        for (c, nonzero), d in zip(constrained, digits):
+            if nonzero and d == 0:
+                break
+            total += c * d
+        else:
+            if total % modulus == 0:
+                return True
+    return False
+
+
+class Prefilter:
+    """Run rejection checks and count how often each one fires"""
+
+    def __init__(self):
+        self.checked = 0
+        self.rejected = Counter()
+
+    def accepts(self, puzzle):
+        """Check a puzzle, recording the rejection reason if any"""
+        return self.record(rejection_reason(puzzle))
+
+    def record(self, reason):
+        """Record the outcome of a check made earlier, True if it passed"""
+        self.checked += 1
+        if reason is None:
+            return True
+        self.rejected[reason] += 1
+        return False
+
+    def stats(self):
+        """Get rejection statistics"""
+        return {
+            'checked': self.checked,
+            'passed': self.checked - sum(self.rejected.values()),
+            'rejected': dict(self.rejected)
+        }
\ No newline at end of file
@@ -0,0 +1,179 @@
+"""
+Streaming puzzle export and import, as JSON Lines or packed binary records
+"""
+
+import json
+import math
+import struct
+from itertools import islice
+from database import encode_digits, decode_digits
+
+# Binary file header: magic, format version, puzzle field width, record count
+BINARY_MAGIC = b'CRYP'
+BINARY_VERSION = 1
+HEADER = struct.Struct('<4sBHI')
+
+# Record after the puzzle field: digit vector, letter count, difficulty code,
+# difficulty score, search nodes, backtracks
+RECORD_TAIL = struct.Struct('<10sBBfII')
+
+DIFFICULTY_CODES = {'Easy': 0, 'Medium': 1, 'Hard': 2}
+DIFFICULTY_NAMES = {code: name for name, code in DIFFICULTY_CODES.items()}
+NO_CODE = 0xFF
+NO_COUNT = 0xFFFFFFFF
+
+# Rows per add_puzzles_batch call while importing, which bounds its dedupe set
+IMPORT_CHUNK_SIZE = 10000
+
+
+def export_ndjson(db, filename, letter_count=None):
+    """
+    Write puzzles as JSON Lines, one object per line
+
+    Args:
+        db: PuzzleDatabase instance
+        filename: Output path
+        letter_count: Optional letter count filter
+
+    Returns:
+        Number of puzzles written
+    """
+    count = 0
+    with open(filename, 'w') as f:
+        for row in db.iter_puzzle_rows(letter_count):
+            f.write(json.dumps({
+                'puzzle': row[0],
+                'difficulty': row[1],
+                'letter_count': row[2],
+                'mapping': json.loads(row[3]),
+                'difficulty_score': row[4],
+                'search_nodes': row[5],
+                'backtracks': row[6]
+            }) + '\n')
+            count += 1
+    return count
+
+
+def _ndjson_rows(f):
+    """Yield add_puzzles_batch rows from an open JSON Lines file"""
+    for line in f:
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        yield (
+            record['puzzle'],
+            record['difficulty'],
+            record['letter_count'],
+            json.dumps(record['mapping']),
+            record.get('difficulty_score'),
+            record.get('search_nodes'),
+            record.get('backtracks')
+        )
+
+
+def import_ndjson(db, filename):
+    """
+    Load puzzles from a JSON Lines file written by export_ndjson
+
+    Returns:
+        Number of puzzles added (puzzles already stored are skipped)
+    """
+    with open(filename) as f:
+        return _import_rows(db, _ndjson_rows(f))
+
+
+def export_binary(db, filename, letter_count=None):
+    """
+    Write puzzles as fixed-width binary records behind a header
+
+    Every record holds the puzzle string NUL-padded to the longest stored
+    puzzle, then RECORD_TAIL. Solutions are 10-byte digit vectors, as in
+    the digits column. The record count in the header is filled in last.
+
+    Args:
+        db: PuzzleDatabase instance
+        filename: Output path
+        letter_count: Optional letter count filter
+
+    Returns:
+        Number of puzzles written
+    """
+    width = db.max_puzzle_length(letter_count)
+    count = 0
+    with open(filename, 'wb') as f:
+        f.write(HEADER.pack(BINARY_MAGIC, BINARY_VERSION, width, NO_COUNT))
+        for row in db.iter_puzzle_rows(letter_count):
+            f.write(pack_record(row, width))
+            count += 1
+        f.seek(0)
+        f.write(HEADER.pack(BINARY_MAGIC, BINARY_VERSION, width, count))
+    return count
+
+
+def pack_record(row, width):
+    """Pack one add_puzzles_batch row into a binary record"""
+    puzzle, difficulty, letter_count, solution, score, nodes, backtracks = row
+    return puzzle.encode('ascii').ljust(width, b'\0') + RECORD_TAIL.pack(
+        encode_digits(json.loads(solution)),
+        letter_count,
+        DIFFICULTY_CODES.get(difficulty, NO_CODE),
+        math.nan if score is None else score,
+        NO_COUNT if nodes is None else nodes,
+        NO_COUNT if backtracks is None else backtracks
+    )
+
+
+def unpack_record(buffer, offset, width):
+    """
+    Unpack the binary record at offset in buffer
+
+    Returns:
+        Tuple (puzzle, difficulty, letter_count, digits, difficulty_score,
+        search_nodes, backtracks), digits being the 10-byte vector
+    """
+    digits, letter_count, code, score, nodes, backtracks = RECORD_TAIL.unpack_from(
+        buffer, offset + width)
+    return (
+        bytes(buffer[offset:offset + width]).rstrip(b'\0').decode('ascii'),
+        DIFFICULTY_NAMES.get(code, 'Unknown'),
+        letter_count,
+        digits,
+        None if math.isnan(score) else round(score, 2),
+        None if nodes == NO_COUNT else nodes,
+        None if backtracks == NO_COUNT else backtracks
+    )
+
+
+def _binary_rows(f, width):
+    """Yield add_puzzles_batch rows from an open binary file past its header"""
+    size = width + RECORD_TAIL.size
+    while True:
+        record = f.read(size)
+        if len(record) < size:
+            break
+        row = unpack_record(record, 0, width)
+        yield row[:3] + (json.dumps(decode_digits(row[3])),) + row[4:]
+
+
+def import_binary(db, filename):
+    """
+    Load puzzles from a binary file written by export_binary
+
+    Returns:
+        Number of puzzles added (puzzles already stored are skipped)
+    """
+    with open(filename, 'rb') as f:
+        magic, version, width, _ = HEADER.unpack(f.read(HEADER.size))
+        if magic != BINARY_MAGIC or version != BINARY_VERSION:
+            raise ValueError(f"Not a version {BINARY_VERSION} puzzle file: {filename}")
+        return _import_rows(db, _binary_rows(f, width))
+
+
+def _import_rows(db, rows):
+    """Feed rows to the bulk insert path a chunk at a time"""
+    added = 0
+    while True:
+        chunk = list(islice(rows, IMPORT_CHUNK_SIZE))
+        if not chunk:
+            return added
+        added += db.add_puzzles_batch(chunk)
@@ -2,23 +2,99 @@
 Quiz state management
 """
 
+import threading
+from collections import deque
+from solver import DIFFICULTY_BANDS
+
 
 class QuizState:
     """Manage quiz state and scoring"""
 
-    def __init__(self, db):
+    def __init__(self, db, source=None):
         self.db = db
+        # Where decks come from: db, or anything with the same
+        # get_random_puzzles and get_group_counts, such as a PuzzleSnapshot
+        self.source = source or db
         self.current_puzzle = None
         self.score = 0
         self.attempts = 0
         self.hints_used = 0
         self.questions_answered = 0
         self.max_questions = 10
+        self.difficulty = None  # None for any difficulty band
+
+        # Upcoming puzzles, fetched a whole quiz at a time
+        self.deck = deque()
+        self._deck_difficulty = None
+        self._deck_lock = threading.Lock()
+        self._refilling = False
+
+    def _fetch_deck(self, difficulty):
+        """Fetch max_questions distinct puzzles with their stored solutions"""
+        return self.source.get_random_puzzles(
+            self.max_questions, letter_count=3, difficulty=difficulty)
+
+    def available_difficulties(self):
+        """
+        Get the difficulty bands the source has quiz puzzles for, dropping
+        the selected band if it has none left
+
+        Returns:
+            List of band names in DIFFICULTY_BANDS order
+        """
+        counts = self.source.get_group_counts()
+        bands = [band for band in DIFFICULTY_BANDS if counts.get((3, band))]
+        if self.difficulty not in bands:
+            self.difficulty = None
+        return bands
+
+    def load_deck(self):
+        """Replace the deck with a fresh one for the current difficulty"""
+        difficulty = self.difficulty
+        puzzles = self._fetch_deck(difficulty)
+        with self._deck_lock:
+            self.deck = deque(puzzles)
+            self._deck_difficulty = difficulty
+
+    def refill_in_background(self):
+        """Fetch the next deck on a background thread if the deck is empty"""
+        with self._deck_lock:
+            if self.deck or self._refilling:
+                return
+            self._refilling = True
+        difficulty = self.difficulty
+
+        def refill():
+            try:
+                puzzles = self._fetch_deck(difficulty)
+                with self._deck_lock:
+                    # Keep a deck loaded meanwhile
+                    if not self.deck:
+                        self.deck = deque(puzzles)
+                        self._deck_difficulty = difficulty
+            finally:
+                self._refilling = False
+
+        threading.Thread(target=refill, daemon=True).start()
 
     def new_puzzle(self):
-        """Get a new random puzzle"""
-        self.current_puzzle = self.db.get_random_puzzle(letter_count=3)
+        """
+        Get the next puzzle from the deck
+
+        The puzzle's 'solution' holds the full solution details, so showing
+        it never needs the solver.
+        """
+        with self._deck_lock:
+            stale = not self.deck or self._deck_difficulty != self.difficulty
+        if stale:
+            self.load_deck()
+
+        with self._deck_lock:
+            self.current_puzzle = self.deck.popleft() if self.deck else None
         self.hints_used = 0
+
+        # Have the next quiz's deck ready before it starts
+        self.refill_in_background()
         return self.current_puzzle
 
     def is_quiz_complete(self):
@@ -30,4 +106,4 @@ class QuizState:
         self.score = 0
         self.attempts = 0
         self.hints_used = 0
-        self.questions_answered = 0
\ No newline at end of file
+        self.questions_answered = 0
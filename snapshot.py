@@ -0,0 +1,144 @@
+"""
+Read-only packed puzzle snapshot, served through mmap
+"""
+
+import mmap
+import os
+import random
+import struct
+from database import decode_digits
+from puzzle_io import pack_record, unpack_record, RECORD_TAIL, DIFFICULTY_CODES
+from solver import solution_from_mapping
+
+# Header: magic, format version, puzzle field width, index offset, group count
+SNAPSHOT_MAGIC = b'CSNP'
+SNAPSHOT_VERSION = 1
+HEADER = struct.Struct('<4sBHQI')
+
+# Index entry per (letter_count, difficulty) group: letter count, difficulty
+# code, first record, record count
+INDEX_ENTRY = struct.Struct('<BBII')
+
+
+def build_snapshot(db, filename):
+    """
+    Pack every stored puzzle into a snapshot file
+
+    Records use the puzzle_io binary record layout, grouped by letter count
+    and difficulty so each group is one contiguous run. The index of runs
+    follows the records. The file is written next to filename and renamed
+    into place, so readers never see a partial snapshot.
+
+    Args:
+        db: PuzzleDatabase instance
+        filename: Snapshot path
+
+    Returns:
+        Number of puzzles written
+    """
+    width = db.max_puzzle_length()
+    groups = []
+    count = 0
+    tmp_name = filename + '.tmp'
+    with open(tmp_name, 'wb') as f:
+        f.write(HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, width, 0, 0))
+        for row in db.iter_puzzle_rows(grouped=True):
+            key = (row[2], DIFFICULTY_CODES.get(row[1], 0xFF))
+            if not groups or groups[-1][0] != key:
+                groups.append([key, count, 0])
+            groups[-1][2] += 1
+            f.write(pack_record(row, width))
+            count += 1
+
+        index_offset = f.tell()
+        for (letter_count, code), first, size in groups:
+            f.write(INDEX_ENTRY.pack(letter_count, code, first, size))
+        f.seek(0)
+        f.write(HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, width, index_offset, len(groups)))
+    os.replace(tmp_name, filename)
+    return count
+
+
+class PuzzleSnapshot:
+    """
+    Random puzzle selection from a snapshot file built by build_snapshot.
+
+    The file is mapped read-only, so processes serving the same snapshot
+    share it through the page cache. Picking a puzzle is an offset
+    computation and one record unpack. Offers get_random_puzzle(s) like
+    PuzzleDatabase, so it can stand in as a QuizState source.
+    """
+
+    def __init__(self, filename):
+        with open(filename, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.width, index_offset, group_count = HEADER.unpack_from(self._map)
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            self._map.close()
+            raise ValueError(f"Not a version {SNAPSHOT_VERSION} puzzle snapshot: {filename}")
+
+        self.record_size = self.width + RECORD_TAIL.size
+        names = {code: name for name, code in DIFFICULTY_CODES.items()}
+        # (letter_count, difficulty) -> (first record, record count)
+        self.groups = {}
+        for i in range(group_count):
+            letter_count, code, first, size = INDEX_ENTRY.unpack_from(
+                self._map, index_offset + i * INDEX_ENTRY.size)
+            self.groups[(letter_count, names.get(code))] = (first, size)
+
+    def count(self, letter_count=None, difficulty=None):
+        """Get the number of puzzles, optionally for one letter count and band"""
+        return sum(size for first, size in self._runs(letter_count, difficulty))
+
+    def get_group_counts(self):
+        """Count puzzles per group, as PuzzleDatabase.get_group_counts"""
+        return {key: size for key, (first, size) in self.groups.items()}
+
+    def _runs(self, letter_count, difficulty):
+        """Get the (first record, record count) runs matching a filter"""
+        return [run for (group_letters, group_difficulty), run in self.groups.items()
+                if letter_count in (None, group_letters)
+                and difficulty in (None, group_difficulty)]
+
+    def puzzle(self, record):
+        """Get the puzzle dictionary of a record number"""
+        puzzle, difficulty, _, digits, score, _, _ = unpack_record(
+            self._map, HEADER.size + record * self.record_size, self.width)
+        return {
+            'puzzle': puzzle,
+            'difficulty': difficulty,
+            'solution': solution_from_mapping(puzzle, decode_digits(digits)),
+            'difficulty_score': score
+        }
+
+    def get_random_puzzle(self, letter_count=3, difficulty=None):
+        """Get a random puzzle, as PuzzleDatabase.get_random_puzzle"""
+        puzzles = self.get_random_puzzles(1, letter_count, difficulty)
+        return puzzles[0] if puzzles else None
+
+    def get_random_puzzles(self, count, letter_count=3, difficulty=None):
+        """
+        Get up to count distinct random puzzles, uniformly over the matches
+
+        Args:
+            count: Number of puzzles wanted
+            letter_count: Number of distinct letters
+            difficulty: Optional difficulty band ('Easy', 'Medium' or 'Hard')
+        """
+        runs = self._runs(letter_count, difficulty)
+        total = sum(size for first, size in runs)
+
+        puzzles = []
+        for position in random.sample(range(total), min(count, total)):
+            # Walk the (at most three) runs to the record
+            for first, size in runs:
+                if position < size:
+                    puzzles.append(self.puzzle(first + position))
+                    break
+                position -= size
+        return puzzles
+
+    def close(self):
+        """Unmap the snapshot file"""
+        self._map.close()
@@ -0,0 +1,169 @@
+"""
+Solve cache keyed by canonical puzzle shape
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from string import ascii_uppercase
+from solver import parse_puzzle, solve_cryptarithm, solve_with_metrics
+
+
+def canonicalize(puzzle):
+    """
+    Rename the letters of a puzzle in order of first appearance.
+
+    "XY + YX = ZZ" and "AB + BA = CC" both have the shape "AB+BA=CC", so
+    they share one solve.
+
+    Args:
+        puzzle: String in format "WORD1 + WORD2 = RESULT"
+
+    Returns:
+        Tuple (shape, letters) where letters[i] is the original letter behind
+        the i-th canonical letter, or None if the puzzle is malformed
+    """
+    parsed = parse_puzzle(puzzle)
+    if parsed is None:
+        return None
+
+    operands, result, operation = parsed
+    rename = {}
+    for word in operands + [result]:
+        for c in word:
+            if c not in rename:
+                if len(rename) == len(ascii_uppercase):
+                    return None
+                rename[c] = ascii_uppercase[len(rename)]
+
+    table = str.maketrans(rename)
+    shape = operation.join(word.translate(table) for word in operands)
+    shape += '=' + result.translate(table)
+    return shape, ''.join(rename)
+
+
+class SolveCache:
+    """
+    Bounded cache of solver results shared by all relabelings of a puzzle.
+
+    When a PuzzleDatabase is attached, in-memory misses fall back to its
+    solutions table and fresh results are written there, so other processes
+    and later runs reuse them.
+    """
+
+    EVICTION_POLICIES = ('lru', 'fifo')
+
+    def __init__(self, maxsize=4096, eviction='lru', db=None):
+        if eviction not in self.EVICTION_POLICIES:
+            raise ValueError(f"Unknown eviction policy: {eviction}")
+        self.maxsize = maxsize
+        self.eviction = eviction
+        self.db = db
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def solve(self, puzzle, budget=None):
+        """
+        Solve a puzzle, reusing the result of any puzzle with the same shape.
+
+        Args:
+            puzzle: String in format "WORD1 + WORD2 = RESULT"
+            budget: Optional SearchBudget limiting a solve on a miss, the
+                search then uses the column method
+
+        Returns:
+            Dictionary with solution details or None, as solve_cryptarithm
+
+        Raises:
+            SearchStopped: If the budget runs out, nothing is cached then
+        """
+        canonical = canonicalize(puzzle)
+        if canonical is None:
+            return solve_cryptarithm(puzzle)
+
+        shape, letters = canonical
+        with self._lock:
+            if shape in self._entries:
+                self.hits += 1
+                if self.eviction == 'lru':
+                    self._entries.move_to_end(shape)
+                solution = self._entries[shape]
+                return relabel(solution, letters) if solution else None
+            self.misses += 1
+
+        # Solve outside the lock, concurrent misses on one shape are harmless
+        solution = self._load_or_solve(shape, budget)
+
+        with self._lock:
+            self._entries[shape] = solution
+            self._entries.move_to_end(shape)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+        return relabel(solution, letters) if solution else None
+
+    def _load_or_solve(self, shape, budget=None):
+        """Get a shape's solution from the attached database or by solving it"""
+        if self.db is not None:
+            stored = self.db.get_cached_solution(shape)
+            if stored is not None:
+                return stored['solution']
+
+        start = time.perf_counter()
+        if budget is None:
+            solution = solve_cryptarithm(shape)
+        else:
+            solution = solve_with_metrics(shape, budget)[0]
+        solve_time = time.perf_counter() - start
+
+        if self.db is not None:
+            self.db.store_solution(shape, solution, solve_time)
+        return solution
+
+    def stats(self):
+        """Get hit/miss statistics"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+    def clear(self):
+        """Drop all entries and reset statistics"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+
+def relabel(solution, letters):
+    """Translate a solution of the canonical shape back to the original letters"""
+    table = str.maketrans(ascii_uppercase[:len(letters)], letters)
+    return {
+        'mapping': {letters[ascii_uppercase.index(c)]: d
+                    for c, d in solution['mapping'].items()},
+        'operands': [word.translate(table) for word in solution['operands']],
+        'result': solution['result'].translate(table),
+        'operation': solution['operation'],
+        'numbers': list(solution['numbers']),
+        'result_num': solution['result_num']
+    }
+
+
+# Shared cache for the solver page and the HTTP API
+default_cache = SolveCache()
+
+
+def cached_solve(puzzle, budget=None):
+    """Solve a puzzle through the shared solve cache"""
+    return default_cache.solve(puzzle, budget)
\ No newline at end of file
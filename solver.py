@@ -2,80 +2,648 @@
 Cryptarithmetic puzzle solver
 """
 
+import math
+import time
 from itertools import permutations
 
+# NumPy is optional and only imported by the first brute-force solve, so it
+# stays out of startup; without it the brute-force method falls back to Python
+np = None
+_numpy_checked = False
 
-def solve_cryptarithm(puzzle):
+# Upper bound on the rows of one permutation block in the NumPy backend
+BRUTE_BLOCK_SIZE = 65536
+
+# Nodes the column search visits between SearchStats.check() calls
+CHECK_INTERVAL = 4096
+
+
+def parse_puzzle(puzzle):
     """
-    Solve a cryptarithmetic puzzle.
+    Parse a puzzle string into its words.
 
     Args:
         puzzle: String in format "WORD1 + WORD2 = RESULT"
 
     Returns:
-        Dictionary with solution details or None
+        Tuple (operands, result, operation) or None if the format is invalid
     """
-    try:
-        parts = puzzle.replace(" ", "").upper().split("=")
-        if len(parts) != 2:
-            return None
-
-        left_side = parts[0]
-        result = parts[1]
-
-        if "+" in left_side:
-            operands = left_side.split("+")
-            operation = "+"
-        elif "-" in left_side:
-            operands = left_side.split("-")
-            operation = "-"
-        else:
-            return None
+    parts = puzzle.replace(" ", "").upper().split("=")
+    if len(parts) != 2:
+        return None
+
+    left_side = parts[0]
+    result = parts[1]
 
-        all_words = operands + [result]
-        letters = set(''.join(all_words))
+    if "+" in left_side:
+        operands = left_side.split("+")
+        operation = "+"
+    elif "-" in left_side:
+        operands = left_side.split("-")
+        operation = "-"
+    else:
+        return None
+
+    if not result or not all(operands):
+        return None
 
-        if len(letters) > 10:
-            return None
+    return operands, result, operation
+
+
+def word_value(word, mapping):
+    """Convert a word to its number under a letter to digit mapping"""
+    value = 0
+    for c in word:
+        value = value * 10 + mapping[c]
+    return value
+
+
+def solution_from_mapping(puzzle, mapping):
+    """
+    Build the solution dictionary for a known mapping, without searching.
+
+    Args:
+        puzzle: String in format "WORD1 + WORD2 = RESULT"
+        mapping: Letter to digit dictionary, such as a stored solution
+
+    Returns:
+        Dictionary with solution details, as solve_cryptarithm, or None if
+        the puzzle is malformed
+    """
+    parsed = parse_puzzle(puzzle)
+    if parsed is None:
+        return None
+
+    operands, result, operation = parsed
+    return {
+        'mapping': mapping,
+        'operands': operands,
+        'result': result,
+        'operation': operation,
+        'numbers': [word_value(word, mapping) for word in operands],
+        'result_num': word_value(result, mapping)
+    }
+
+
+class CompiledPuzzle:
+    """
+    A parsed puzzle reduced to one integer coefficient per letter.
+
+    A digit assignment solves the puzzle when it is injective, keeps leading
+    letters non-zero and makes sum(coefficient * digit) equal to 0. Instances
+    only hold tuples and strings, so they can be cached and pickled to worker
+    processes.
+    """
+
+    def __init__(self, operands, result, operation):
+        self.operands = tuple(operands)
+        self.result = result
+        self.operation = operation
+
+        # A - B = C is searched as B + C = A
+        if operation == "+":
+            self.addends, self.total = self.operands, result
+        else:
+            self.addends = self.operands[1:] + (result,)
+            self.total = self.operands[0]
+
+        weights = {}
+        for word in self.addends:
+            _add_word_weights(weights, word, 1)
+        _add_word_weights(weights, self.total, -1)
 
         # Only consider letters as leading if the word has more than 1 character
         # Single character words (like "K" or "D") can be any digit including 0
+        all_words = self.operands + (result,)
         leading_letters = set(word[0] for word in all_words if len(word) > 1)
 
-        for perm in permutations(range(10), len(letters)):
-            mapping = dict(zip(letters, perm))
+        # Largest coefficients first so the bounds cut early in the search
+        self.letters = tuple(sorted(weights, key=lambda c: -abs(weights[c])))
+        self.coefficients = tuple(weights[c] for c in self.letters)
+        self.nonzero = tuple(c in leading_letters for c in self.letters)
+
+        self.column_letters, self.column_plan = _column_plan(self.addends, self.total)
+        self.column_nonzero = tuple(c in leading_letters for c in self.column_letters)
+
+    def solution(self, mapping):
+        """Build the solution dictionary for a letter to digit mapping"""
+        return {
+            'mapping': mapping,
+            'operands': list(self.operands),
+            'result': self.result,
+            'operation': self.operation,
+            'numbers': [word_value(word, mapping) for word in self.operands],
+            'result_num': word_value(self.result, mapping)
+        }
 
-            if any(mapping[letter] == 0 for letter in leading_letters):
-                continue
 
-            numbers = []
-            for word in operands:
-                num = int(''.join(str(mapping[c]) for c in word))
-                numbers.append(num)
-
-            result_num = int(''.join(str(mapping[c]) for c in result))
-
-            if operation == "+":
-                if sum(numbers) == result_num:
-                    return {
-                        'mapping': mapping,
-                        'operands': operands,
-                        'result': result,
-                        'operation': operation,
-                        'numbers': numbers,
-                        'result_num': result_num
-                    }
-            elif operation == "-":
-                if numbers[0] - numbers[1] == result_num:
-                    return {
-                        'mapping': mapping,
-                        'operands': operands,
-                        'result': result,
-                        'operation': operation,
-                        'numbers': numbers,
-                        'result_num': result_num
-                    }
+def _add_word_weights(weights, word, sign):
+    """Add the positional weight of each letter in word to weights"""
+    place = sign
+    for c in reversed(word):
+        weights[c] = weights.get(c, 0) + place
+        place *= 10
+
+
+def compile_puzzle(puzzle):
+    """
+    Compile a puzzle string into its linear coefficient form.
+
+    Args:
+        puzzle: String in format "WORD1 + WORD2 = RESULT"
+
+    Returns:
+        CompiledPuzzle or None if the puzzle is malformed or uses more
+        than 10 distinct letters
+    """
+    parsed = parse_puzzle(puzzle)
+    if parsed is None:
+        return None
 
+    operands, result, operation = parsed
+    if len(set(''.join(operands) + result)) > 10:
         return None
+
+    return CompiledPuzzle(operands, result, operation)
+
+
+def _column_plan(addends, total):
+    """
+    Split the addition sum(addends) == total into per-column steps,
+    starting from the least significant digit.
+
+    Letters are numbered in the order the search first meets them, so the
+    letters that become assigned in each column are known up front.
+
+    Returns:
+        Tuple (letters, plan). Each plan entry is
+        (new_letters, terms, result_letter, result_is_new) with letters given
+        as indices; result_letter is -1 when the column is past the result.
+    """
+    letters = []
+    index = {}
+    width = max(len(word) for word in addends + (total,))
+    plan = []
+
+    for col in range(width):
+        new_letters = []
+        terms = []
+        for word in addends:
+            if col < len(word):
+                c = word[-1 - col]
+                if c not in index:
+                    index[c] = len(letters)
+                    letters.append(c)
+                    new_letters.append(index[c])
+                terms.append(index[c])
+
+        result_letter = -1
+        result_is_new = False
+        if col < len(total):
+            c = total[-1 - col]
+            if c not in index:
+                index[c] = len(letters)
+                letters.append(c)
+                result_is_new = True
+            result_letter = index[c]
+
+        plan.append((tuple(new_letters), tuple(terms), result_letter, result_is_new))
+
+    return tuple(letters), tuple(plan)
+
+
+def _column_solutions(compiled, stats=None):
+    """
+    Yield every digit assignment with sum(addends) == total.
+
+    Digits are assigned column by column from the right while the carry is
+    tracked, so a branch is dropped as soon as one column does not add up.
+    When a SearchStats is given, the search effort is counted into it and
+    its check() runs whenever nodes reaches its check_at.
+    """
+    letters = compiled.column_letters
+    plan = compiled.column_plan
+    nonzero = compiled.column_nonzero
+    values = [0] * len(letters)
+    used = [False] * 10
+    last_col = len(plan) - 1
+
+    # Letters already assigned when each column is checked
+    depths = []
+    assigned = 0
+    for new_letters, _, _, result_is_new in plan:
+        assigned += len(new_letters)
+        depths.append(assigned)
+        assigned += result_is_new
+
+    def search(col, pos, carry):
+        new_letters, terms, result_letter, result_is_new = plan[col]
+
+        # Assign the letters that first appear in this column
+        if pos < len(new_letters):
+            i = new_letters[pos]
+            for d in range(1 if nonzero[i] else 0, 10):
+                if not used[d]:
+                    if stats is not None:
+                        stats.nodes += 1
+                        if stats.nodes >= stats.check_at:
+                            stats.check()
+                    used[d] = True
+                    values[i] = d
+                    yield from search(col, pos + 1, carry)
+                    used[d] = False
+            return
+
+        s = carry
+        for i in terms:
+            s += values[i]
+        digit = s % 10
+        carry = s // 10
+
+        if result_letter < 0:
+            fits = digit == 0
+        elif result_is_new:
+            fits = not used[digit] and (digit != 0 or not nonzero[result_letter])
+        else:
+            fits = values[result_letter] == digit
+        if col == last_col and carry != 0:
+            fits = False
+
+        if not fits:
+            if stats is not None:
+                stats.prune(depths[col])
+            return
+
+        if result_is_new:
+            values[result_letter] = digit
+            used[digit] = True
+        if col == last_col:
+            yield dict(zip(letters, values))
+        else:
+            yield from search(col + 1, 0, carry)
+        if result_is_new:
+            used[digit] = False
+
+    yield from search(0, 0, 0)
+
+
+# Difficulty score range [low, high) of each difficulty label
+DIFFICULTY_BANDS = {
+    'Easy': (0, 15),
+    'Medium': (15, 30),
+    'Hard': (30, None),
+}
+
+
+def difficulty_for_score(score):
+    """Map a difficulty score to its difficulty label"""
+    for label, (low, high) in DIFFICULTY_BANDS.items():
+        if score >= low and (high is None or score < high):
+            return label
+    return 'Hard'
+
+
+class SearchStats:
+    """Search effort counters filled in by the column search"""
+
+    def __init__(self):
+        self.nodes = 0
+        self.backtracks = 0
+        self.prune_depth_total = 0
+        # Node count at which the search next calls check()
+        self.check_at = CHECK_INTERVAL
+
+    def prune(self, depth):
+        """Count a branch dropped after depth letters were assigned"""
+        self.backtracks += 1
+        self.prune_depth_total += depth
+
+    def check(self):
+        """Called periodically during the search, a hook for subclasses"""
+        self.check_at = self.nodes + CHECK_INTERVAL
+
+    def metrics(self):
+        """
+        Summarise the counters.
+
+        difficulty_score grows with the work needed to reach the answer
+        (10 points per factor of ten in nodes visited) and with how deep
+        wrong guesses survive before a column rules them out.
+        """
+        prune_depth = self.prune_depth_total / self.backtracks if self.backtracks else 0.0
+        return {
+            'nodes': self.nodes,
+            'backtracks': self.backtracks,
+            'prune_depth': round(prune_depth, 2),
+            'difficulty_score': round(10 * math.log10(1 + self.nodes) + prune_depth, 2)
+        }
+
+
+class SearchStopped(Exception):
+    """Raised out of a search whose SearchBudget ran out or was cancelled"""
+
+    def __init__(self, reason):
+        super().__init__(reason)
+        self.reason = reason  # 'cancelled', 'deadline' or 'node_budget'
+
+
+class SearchBudget(SearchStats):
+    """
+    SearchStats that can stop the column search part way.
+
+    The search calls check() every CHECK_INTERVAL nodes and exactly at
+    max_nodes, which raises SearchStopped once the cancel event is set, the
+    time limit has passed or max_nodes nodes were visited. nodes and
+    elapsed() may be read from another thread to report progress.
+
+    Args:
+        timeout: Seconds the search may run
+        max_nodes: Nodes the search may visit
+        cancel_event: threading.Event that stops the search when set
+    """
+
+    def __init__(self, timeout=None, max_nodes=None, cancel_event=None):
+        super().__init__()
+        self.started = time.monotonic()
+        self.deadline = self.started + timeout if timeout else None
+        self.max_nodes = max_nodes
+        self.cancel_event = cancel_event
+        if max_nodes is not None:
+            self.check_at = min(self.check_at, max_nodes)
+
+    def elapsed(self):
+        """Seconds since the budget was created"""
+        return time.monotonic() - self.started
+
+    def check(self):
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise SearchStopped('cancelled')
+        if self.max_nodes is not None and self.nodes >= self.max_nodes:
+            raise SearchStopped('node_budget')
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            raise SearchStopped('deadline')
+        super().check()
+        if self.max_nodes is not None:
+            self.check_at = min(self.check_at, self.max_nodes)
+
+
+def _linear_solutions(compiled):
+    """
+    Yield every digit assignment whose weighted letter sum is 0.
+
+    Letters are assigned in order of decreasing coefficient size while the
+    partial sum is kept incrementally. A digit is skipped once the remaining
+    letters can no longer bring the sum back to 0, and the last letter is
+    solved for directly.
+    """
+    letters = compiled.letters
+    coefficients = compiled.coefficients
+    nonzero = compiled.nonzero
+    n = len(letters)
+
+    # Bounds on what the letters after position k can still contribute
+    rest_max = [0] * (n + 1)
+    rest_min = [0] * (n + 1)
+    for k in range(n - 1, -1, -1):
+        c = coefficients[k]
+        rest_max[k] = rest_max[k + 1] + (9 * c if c > 0 else 0)
+        rest_min[k] = rest_min[k + 1] + (9 * c if c < 0 else 0)
+
+    values = [0] * n
+    used = [False] * 10
+    last = n - 1
+
+    def search(k, s):
+        c = coefficients[k]
+        first = 1 if nonzero[k] else 0
+
+        if k == last:
+            if c == 0:
+                if s == 0:
+                    for d in range(first, 10):
+                        if not used[d]:
+                            values[k] = d
+                            yield dict(zip(letters, values))
+            elif s % c == 0:
+                d = -s // c
+                if first <= d <= 9 and not used[d]:
+                    values[k] = d
+                    yield dict(zip(letters, values))
+            return
+
+        hi = rest_max[k + 1]
+        lo = rest_min[k + 1]
+        for d in range(first, 10):
+            if used[d]:
+                continue
+            t = s + c * d
+            # t only moves one way as d grows, so stop once it overshoots
+            if t + hi < 0:
+                if c < 0:
+                    break
+                continue
+            if t + lo > 0:
+                if c > 0:
+                    break
+                continue
+            used[d] = True
+            values[k] = d
+            yield from search(k + 1, t)
+            used[d] = False
+
+    yield from search(0, 0)
+
+
+def _python_brute_solutions(compiled):
+    """Yield solutions by checking every injective digit assignment"""
+    letters = compiled.letters
+    terms = tuple(zip(compiled.coefficients, compiled.nonzero))
+
+    for perm in permutations(range(10), len(letters)):
+        s = 0
+        for (c, nonzero), d in zip(terms, perm):
+            if nonzero and d == 0:
+                break
+            s += c * d
+        else:
+            if s == 0:
+                yield dict(zip(letters, perm))
+
+
+def _load_numpy():
+    """Import NumPy on first use, None if it is not installed"""
+    global np, _numpy_checked
+    if not _numpy_checked:
+        try:
+            import numpy
+            np = numpy
+        except ImportError:
+            pass
+        _numpy_checked = True
+    return np
+
+
+def _numpy_brute_solutions(compiled, block_size):
+    """
+    Yield solutions by checking every injective digit assignment, one block
+    of permutations at a time.
+
+    The first letters are fixed by a small Python loop. For each such prefix
+    the remaining letters take every arrangement of the free digits, built
+    as an int8 matrix from a precomputed index template, so memory stays
+    bounded by block_size instead of 10!/(10-n)!.
+    """
+    letters = compiled.letters
+    n = len(letters)
+    coefficients = np.array(compiled.coefficients, dtype=np.int64)
+    nonzero = np.array(compiled.nonzero, dtype=bool)
+
+    # Fix as few leading letters as possible while a block still fits
+    prefix_len = 0
+    while prefix_len < n and _perm_count(10 - prefix_len, n - prefix_len) > block_size:
+        prefix_len += 1
+
+    template = np.array(
+        list(permutations(range(10 - prefix_len), n - prefix_len)),
+        dtype=np.int8
+    ).reshape(-1, n - prefix_len)
+    rest_coefficients = coefficients[prefix_len:]
+    rest_nonzero = np.flatnonzero(nonzero[prefix_len:])
+
+    for prefix in permutations(range(10), prefix_len):
+        if any(d == 0 and nz for d, nz in zip(prefix, compiled.nonzero)):
+            continue
+
+        free = np.array([d for d in range(10) if d not in prefix], dtype=np.int8)
+        block = free[template]
+
+        target = -sum(c * d for c, d in zip(compiled.coefficients, prefix))
+        hits = block @ rest_coefficients == target
+        if rest_nonzero.size:
+            hits &= (block[:, rest_nonzero] != 0).all(axis=1)
+
+        for row in block[hits]:
+            yield dict(zip(letters, prefix + tuple(int(d) for d in row)))
+
+
+def _perm_count(n, k):
+    """Number of k-permutations of n items"""
+    count = 1
+    for i in range(n - k + 1, n + 1):
+        count *= i
+    return count
+
+
+def _brute_solutions(compiled):
+    """
+    Yield solutions by exhaustive enumeration, vectorised with NumPy when it
+    is installed.
+    """
+    if _load_numpy() is None:
+        return _python_brute_solutions(compiled)
+    return _numpy_brute_solutions(compiled, BRUTE_BLOCK_SIZE)
+
+
+METHODS = {
+    'column': _column_solutions,
+    'linear': _linear_solutions,
+    'brute': _brute_solutions,
+}
+
+
+def _as_compiled(puzzle):
+    """Return puzzle as a CompiledPuzzle, or None if it cannot be compiled"""
+    if isinstance(puzzle, CompiledPuzzle):
+        return puzzle
+    return compile_puzzle(puzzle)
+
+
+def solve_cryptarithm(puzzle, method='linear'):
+    """
+    Solve a cryptarithmetic puzzle.
+
+    Args:
+        puzzle: String in format "WORD1 + WORD2 = RESULT" or a CompiledPuzzle
+        method: Search strategy, a key of METHODS
+
+    Returns:
+        Dictionary with solution details or None
+    """
+    try:
+        return next(iter_solutions(puzzle, method), None)
     except Exception:
-        return None
\ No newline at end of file
+        return None
+
+
+def iter_solutions(puzzle, method='linear'):
+    """
+    Yield every solution of a puzzle, one at a time.
+
+    The search only runs as far as the caller consumes, so taking the first
+    few solutions costs no more than finding them.
+
+    Args:
+        puzzle: String in format "WORD1 + WORD2 = RESULT" or a CompiledPuzzle
+        method: Search strategy, a key of METHODS
+
+    Yields:
+        Dictionaries with solution details, in the format of solve_cryptarithm
+    """
+    compiled = _as_compiled(puzzle)
+    if compiled is None:
+        return
+
+    for mapping in METHODS[method](compiled):
+        yield compiled.solution(mapping)
+
+
+def solve_with_metrics(puzzle, stats=None):
+    """
+    Solve a puzzle with the column search while measuring its effort.
+
+    The column search works through the sum the way a person would, so the
+    work it needs for the first solution doubles as a difficulty measure.
+
+    Args:
+        puzzle: String in format "WORD1 + WORD2 = RESULT" or a CompiledPuzzle
+        stats: SearchStats to count into, a SearchBudget limits the search
+
+    Returns:
+        Tuple (solution or None, metrics) with metrics from SearchStats.metrics
+
+    Raises:
+        SearchStopped: If stats is a SearchBudget that runs out
+    """
+    if stats is None:
+        stats = SearchStats()
+    solution = None
+    compiled = _as_compiled(puzzle)
+    if compiled is not None:
+        for mapping in _column_solutions(compiled, stats):
+            solution = compiled.solution(mapping)
+            break
+    return solution, stats.metrics()
+
+
+def count_solutions(puzzle, limit=None, method='linear'):
+    """
+    Count the solutions of a puzzle.
+
+    Args:
+        puzzle: String in format "WORD1 + WORD2 = RESULT" or a CompiledPuzzle
+        limit: Stop searching once this many solutions are found
+        method: Search strategy, a key of METHODS
+
+    Returns:
+        Number of solutions, capped at limit
+    """
+    compiled = _as_compiled(puzzle)
+    if compiled is None:
+        return 0
+
+    count = 0
+    for _ in METHODS[method](compiled):
+        count += 1
+        if count == limit:
+            break
+    return count
\ No newline at end of file
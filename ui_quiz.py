@@ -5,8 +5,6 @@ Note: This is a large file, split into logical sections
 
 from nicegui import ui
 import random
-from solver import solve_cryptarithm
-from generator import generate_3_letter_puzzles
 from ui_solver import display_solution
 
 
@@ -243,7 +241,7 @@ def create_quiz_question(quiz_container, quiz_state, solution, puzzle, difficult
                 )
 
 
-def create_quiz_page(content_area, db, quiz_state):
+def create_quiz_page(content_area, db, quiz_state, jobs):
     """Create the quiz interface - Main entry point"""
     content_area.clear()
 
@@ -301,7 +299,7 @@ def create_quiz_page(content_area, db, quiz_state):
 
             puzzle = puzzle_data['puzzle']
             difficulty = puzzle_data['difficulty']
-            solution = solve_cryptarithm(puzzle)
+            solution = puzzle_data['solution']
 
             create_quiz_question(
                 quiz_container, quiz_state, solution, puzzle, difficulty,
@@ -314,10 +312,10 @@ def create_quiz_page(content_area, db, quiz_state):
             start_quiz()
 
         def generate_puzzles():
-            ui.notify('Generating puzzles... Please wait', type='info')
-            count = generate_3_letter_puzzles(db, 500)
-            db_info.text = f'📚 Database: {count} puzzles available'
-            ui.notify(f'Generated! Total: {count} puzzles', type='positive')
+            if jobs.start(500) is None:
+                ui.notify('A generation job is already running', type='warning')
+            else:
+                ui.notify('Generating puzzles in the background', type='info')
 
         def export_puzzles():
             count = db.export_to_json('puzzles.json')
@@ -332,6 +330,15 @@ def create_quiz_page(content_area, db, quiz_state):
                 'bg-gray-400 text-white text-xl px-8 py-4'
             )
 
+            def set_difficulty(e):
+                quiz_state.difficulty = None if e.value == 'Any' else e.value
+
+            # Only bands with puzzles, no pattern may produce some of them
+            difficulty_select = ui.select(
+                ['Any'] + quiz_state.available_difficulties(),
+                value=quiz_state.difficulty or 'Any', label='Difficulty',
+                on_change=set_difficulty).classes('w-40')
+
         # Database management
         with ui.card().classes('w-full p-6 mt-6 bg-gray-50'):
             ui.label('🗄️ Database Management').classes('text-xl font-semibold mb-4')
@@ -341,4 +348,45 @@ def create_quiz_page(content_area, db, quiz_state):
                 )
                 ui.button('📥 Export to JSON', on_click=export_puzzles).classes(
                     'bg-green-600 text-white px-6 py-3'
-                )
\ No newline at end of file
+                )
+                cancel_button = ui.button('✖ Cancel Generation', on_click=jobs.cancel).classes(
+                    'bg-red-500 text-white px-6 py-3'
+                )
+
+            job_label = ui.label('').classes('text-gray-600 mt-4')
+            job_progress = ui.linear_progress(value=0, show_value=False).classes('mt-2')
+            last_job = jobs.job
+            last_status = jobs.job.status if jobs.job else None
+
+            def show_job():
+                """Poll the job runner, the job itself runs on another thread"""
+                nonlocal last_job, last_status
+                job = jobs.job
+                running = job is not None and job.is_running()
+                cancel_button.set_visibility(running)
+                job_progress.set_visibility(running)
+                if job is None:
+                    job_label.text = ''
+                    return
+
+                if running:
+                    job_label.text = f'⏳ {job.name}: {job.added}/{job.count}'
+                    job_progress.value = job.fraction()
+                else:
+                    job_label.text = f'{job.name}: {job.status} ({job.added} added)'
+
+                # Refresh the count once when a job ends
+                if (job is not last_job or job.status != last_status) and not running:
+                    count = db.get_puzzle_count()
+                    db_info.text = f'📚 Database: {count} puzzles available'
+                    difficulty_select.options = ['Any'] + quiz_state.available_difficulties()
+                    difficulty_select.value = quiz_state.difficulty or 'Any'
+                    difficulty_select.update()
+                    if job.status == 'done':
+                        ui.notify(f'Generated! Total: {count} puzzles', type='positive')
+                    elif job.status == 'failed':
+                        ui.notify(f'Generation failed: {job.error}', type='negative')
+                last_job = job
+                last_status = job.status
+
+            ui.timer(0.5, show_job)
\ No newline at end of file
@@ -2,8 +2,14 @@
 Solver page UI components
 """
 
-from nicegui import ui
-from solver import solve_cryptarithm
+import threading
+from nicegui import run, ui
+from solve_cache import cached_solve
+from solver import SearchBudget, SearchStopped
+
+# Limits on one solve started from the page
+SOLVE_TIMEOUT = 30.0  # Seconds
+SOLVE_MAX_NODES = 50_000_000
 
 
 def display_solution(container, puzzle, solution):
@@ -66,8 +72,16 @@ def create_solver_page(content_area):
             ).classes('w-full text-lg')
 
             result_container = ui.column().classes('w-full mt-4')
+            # Cancel event of the solve in progress, if any
+            active_cancel = None
+
+            def cancel_solve():
+                if active_cancel is not None:
+                    active_cancel.set()
 
-            def solve_puzzle():
+            async def solve_puzzle():
+                nonlocal active_cancel
+                cancel_solve()  # A new solve replaces one still running
                 result_container.clear()
                 puzzle = puzzle_input.value.strip()
 
@@ -78,13 +92,55 @@ def create_solver_page(content_area):
                             'text-xl text-orange-600')
                     return
 
+                cancel_event = threading.Event()
+                active_cancel = cancel_event
+                budget = SearchBudget(timeout=SOLVE_TIMEOUT, max_nodes=SOLVE_MAX_NODES,
+                                      cancel_event=cancel_event)
+
                 with result_container:
-                    ui.label('🔍 Solving puzzle...').classes('text-lg text-blue-600')
+                    with ui.row().classes('items-center gap-4'):
+                        ui.label('🔍 Solving puzzle...').classes('text-lg text-blue-600')
+                        ui.button('✖ Cancel', on_click=cancel_event.set).classes(
+                            'bg-red-500 text-white')
+                    progress_label = ui.label('').classes('text-gray-600')
+
+                    def show_progress():
+                        progress_label.text = (f'{budget.nodes:,} positions searched '
+                                               f'in {budget.elapsed():.1f}s')
+
+                    progress_timer = ui.timer(0.25, show_progress)
+
+                # Search in a worker thread so the event loop keeps serving other clients
+                try:
+                    solution = await run.io_bound(cached_solve, puzzle, budget)
+                except SearchStopped as e:
+                    solution = None
+                    stopped = e.reason
+                else:
+                    stopped = None
+                finally:
+                    progress_timer.cancel()
 
-                solution = solve_cryptarithm(puzzle)
+                # A newer solve has taken over the result area
+                if active_cancel is not cancel_event:
+                    return
+                active_cancel = None
                 result_container.clear()
 
-                if solution:
+                if stopped:
+                    message = {
+                        'cancelled': 'The search was cancelled.',
+                        'deadline': f'No answer within {SOLVE_TIMEOUT:.0f} seconds.',
+                        'node_budget': f'No answer within {SOLVE_MAX_NODES:,} positions.',
+                    }[stopped]
+                    with result_container:
+                        with ui.card().classes(
+                                'w-full bg-yellow-50 border-2 border-yellow-400'):
+                            ui.label('⏹ Search Stopped').classes(
+                                'text-2xl font-bold text-yellow-700')
+                            ui.label(message).classes('text-yellow-700')
+                    ui.notify(message, type='warning')
+                elif solution:
                     display_solution(result_container, puzzle, solution)
                     ui.notify('Solution found!', type='positive')
                 else:
@@ -101,9 +157,9 @@ def create_solver_page(content_area):
                 result_container.clear()
                 ui.notify('Cleared!', type='info')
 
-            def load_example(example):
+            async def load_example(example):
                 puzzle_input.value = example
-                solve_puzzle()
+                await solve_puzzle()
 
             puzzle_input.on('keydown.enter', solve_puzzle)
 
@@ -0,0 +1,156 @@
+"""
+Real-word puzzle generator (SEND + MORE = MONEY style)
+"""
+
+import random
+import json
+from solver import solve_with_metrics, difficulty_for_score
+from prefilter import rejection_reason
+
+
+def _letter_mask(word):
+    """Bit mask of the letters A-Z used by an uppercase word"""
+    mask = 0
+    for c in word:
+        mask |= 1 << (ord(c) - ord('A'))
+    return mask
+
+
+class WordIndex:
+    """
+    Words from a word list, grouped by length and by letter set.
+
+    Words sharing a letter set share one mask entry, so joining operands
+    and results only has to look at distinct letter sets.
+    """
+
+    def __init__(self, words, max_letters=10):
+        self.by_length = {}
+        for word in words:
+            word = word.strip().upper()
+            if len(word) < 2 or not word.isascii() or not word.isalpha():
+                continue
+            mask = _letter_mask(word)
+            if mask.bit_count() > max_letters:
+                continue
+            masks = self.by_length.setdefault(len(word), {})
+            masks.setdefault(mask, []).append(word)
+
+        # Lists for random choice
+        self.masks_by_length = {length: list(masks)
+                                for length, masks in self.by_length.items()}
+
+    @classmethod
+    def from_file(cls, path, max_letters=10):
+        """Build an index from a word list file with one word per line"""
+        with open(path) as f:
+            return cls(f, max_letters)
+
+    def random_word(self, rng, length):
+        """Pick a random word of the given length, or None"""
+        masks = self.masks_by_length.get(length)
+        if not masks:
+            return None
+        return rng.choice(self.by_length[length][rng.choice(masks)])
+
+    def completions(self, length, mask, min_letters, max_letters):
+        """
+        Get the words of a length that bring the letter set mask to between
+        min_letters and max_letters distinct letters
+        """
+        words = []
+        for other, group in self.by_length.get(length, {}).items():
+            if min_letters <= (mask | other).bit_count() <= max_letters:
+                words.extend(group)
+        return words
+
+
+def generate_word_puzzles(db, word_file, count=100, min_letters=4,
+                          max_letters=10, seed=None, max_attempts=None):
+    """
+    Generate WORD1 + WORD2 = RESULT puzzles from real words
+
+    A result word is drawn first, then a first operand; the index then
+    yields every second operand that keeps the distinct letter count in
+    range, so only letter-compatible triples are solved.
+
+    Args:
+        db: PuzzleDatabase instance
+        word_file: Path to a word list with one word per line
+        count: Number of new puzzles to add
+        min_letters: Fewest distinct letters per puzzle
+        max_letters: Most distinct letters per puzzle (at most 10)
+        seed: Random seed
+        max_attempts: Result/operand pairs to try (defaults to count * 1000)
+
+    Returns:
+        Total puzzle count in database
+    """
+    index = WordIndex.from_file(word_file, max_letters)
+    rng = random.Random(seed)
+    lengths = sorted(index.by_length)
+    max_attempts = max_attempts or count * 1000
+
+    seen = set()
+    puzzle_batch = []
+    added_total = 0
+
+    print(f"Generating {count} word puzzles...")
+
+    for _ in range(max_attempts):
+        # The result is as long as the longest operand or one digit longer
+        result = index.random_word(rng, rng.choice(lengths))
+        long_len = rng.choice((len(result), len(result) - 1))
+        if long_len < 2:
+            continue
+        short_len = rng.randint(2, long_len)
+
+        word1 = index.random_word(rng, long_len)
+        if word1 is None:
+            continue
+        mask = _letter_mask(result) | _letter_mask(word1)
+        if mask.bit_count() > max_letters:
+            continue
+
+        candidates = index.completions(short_len, mask, min_letters, max_letters)
+        if not candidates:
+            continue
+        word2 = rng.choice(candidates)
+
+        operands = [word1, word2]
+        rng.shuffle(operands)
+        puzzle = f"{operands[0]} + {operands[1]} = {result}"
+        if puzzle in seen or rejection_reason(puzzle) is not None:
+            continue
+        seen.add(puzzle)
+
+        solution, metrics = solve_with_metrics(puzzle)
+        if not solution:
+            continue
+
+        puzzle_batch.append((
+            puzzle,
+            difficulty_for_score(metrics['difficulty_score']),
+            len(solution['mapping']),
+            json.dumps(solution['mapping']),
+            metrics['difficulty_score'],
+            metrics['nodes'],
+            metrics['backtracks']
+        ))
+
+        if len(puzzle_batch) >= min(50, count - added_total):
+            added = db.add_puzzles_batch(puzzle_batch)
+            added_total += added
+            print(f"Added {added} puzzles... (Total: {db.get_puzzle_count()})")
+            puzzle_batch = []
+            if added_total >= count:
+                break
+
+    # Save remaining puzzles
+    if puzzle_batch:
+        added = db.add_puzzles_batch(puzzle_batch)
+        print(f"Added {added} puzzles... (Total: {db.get_puzzle_count()})")
+
+    total = db.get_puzzle_count()
+    print(f"✓ Generation complete! Database now contains {total} puzzles")
+    return total
\ No newline at end of file